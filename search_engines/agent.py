@@ -227,7 +227,8 @@ class TaskAgent:
                 country="ru"
             )
             
-            results = await search_engine.search(query, pages=pages)
+            async with search_engine:
+                results = await search_engine.search(query, pages=pages)
             
             return {
                 "success": True,
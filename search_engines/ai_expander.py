@@ -130,13 +130,16 @@ class AIQueryExpander:
     """Класс для расширения поисковых запросов через локальную Ollama"""
     
     DEFAULT_OLLAMA_URL = "http://localhost:11434"
+    DEFAULT_MODEL = "llama3.1:8b"
     DEFAULT_TIMEOUT = 120
     
-    def __init__(self, ollama_url: str = DEFAULT_OLLAMA_URL, model: str = "llama3.1:8b"):
+    def __init__(self, ollama_url: str = DEFAULT_OLLAMA_URL, model: str = DEFAULT_MODEL,
+                 ollama_manager: Optional[OllamaManager] = None):
         self.ollama_url = ollama_url.rstrip('/')
         self.model = model
         self.available_models: List[str] = []
-        self.ollama_manager = OllamaManager()
+        # Менеджер можно передать общий - локальная Ollama одна на все экземпляры
+        self.ollama_manager = ollama_manager or OllamaManager()
         self._was_auto_started = False
         self._auto_stop_enabled = True
     
@@ -188,16 +188,21 @@ class SearchEngine(object):
     
     def _collect_results(self, items):
         '''Colects the search results items.''' 
+        links = set(utils.normalize_url(link) for link in self.results.links())
+        hosts = set(self.results.hosts())
         for item in items:
             if not utils.is_url(item['link']):
                 continue
-            if item in self.results:
+            link = utils.normalize_url(item['link'])
+            if link in links and item in self.results:
                 continue
-            if self.ignore_duplicate_urls and item['link'] in self.results.links():
+            if self.ignore_duplicate_urls and link in links:
                 continue
-            if self.ignore_duplicate_domains and item['host'] in self.results.hosts():
+            if self.ignore_duplicate_domains and item['host'] in hosts:
                 continue
             self.results.append(item)
+            links.add(link)
+            hosts.add(item['host'])
 
     def _is_ok(self, response):
         '''Checks if the HTTP response is 200 OK.'''
@@ -11,6 +11,56 @@ from . import utils as utl
 MAX_RETRIES = 3
 RETRY_BACKOFF_FACTOR = 1.5
 
+_shared_session: Optional[aiohttp.ClientSession] = None
+_shared_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def open_shared_session(
+    limit: int = 100,
+    ttl_dns_cache: int = 300,
+    keepalive_timeout: float = 75
+) -> aiohttp.ClientSession:
+    '''Opens a process-wide session, reused by all clients without a proxy.
+    
+    Must be awaited on the event loop that runs the searches: the session
+    is only handed out to clients running on that loop.
+    Clients share its connection pool (connector), not the session itself:
+    each client opens its own session on the pool, with its own cookie jar,
+    so cookies of one search are kept between its pages and never sent on
+    behalf of another search. The shared session itself keeps no cookies.
+    A session left from another loop (e.g. inherited by a forked worker)
+    is replaced, not reused.
+    '''
+    global _shared_session, _shared_session_loop
+    loop = asyncio.get_running_loop()
+    if _shared_session is None or _shared_session.closed or _shared_session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=limit, ttl_dns_cache=ttl_dns_cache, keepalive_timeout=keepalive_timeout
+        )
+        _shared_session = aiohttp.ClientSession(
+            connector=connector, cookie_jar=aiohttp.DummyCookieJar()
+        )
+        _shared_session_loop = loop
+    return _shared_session
+
+
+async def close_shared_session() -> None:
+    '''Closes the process-wide session.'''
+    global _shared_session, _shared_session_loop
+    if _shared_session is not None:
+        await _shared_session.close()
+    _shared_session = None
+    _shared_session_loop = None
+
+
+def _get_shared_session() -> Optional[aiohttp.ClientSession]:
+    '''Returns the shared session if it belongs to the running loop.'''
+    if _shared_session is None or _shared_session.closed:
+        return None
+    if _shared_session_loop is not asyncio.get_running_loop():
+        return None
+    return _shared_session
+
 
 class HttpClient(object):
     '''Performs HTTP requests. A `aiohttp` wrapper, essentialy'''
@@ -81,7 +131,11 @@ class HttpClient(object):
                 self._connector = ProxyConnector.from_url(self.proxy, ssl=self.proxy_verify_ssl)
                 self.session = aiohttp.ClientSession(connector=self._connector)
             else:
-                self.session = aiohttp.ClientSession()
+                shared = _get_shared_session()
+                if shared is not None:
+                    self.session = aiohttp.ClientSession(connector=shared.connector, connector_owner=False)
+                else:
+                    self.session = aiohttp.ClientSession()
 
     async def close(self) -> None:
         if self.session:
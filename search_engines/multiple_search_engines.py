@@ -3,6 +3,7 @@ from typing import List, Optional
 from .results import SearchResults
 from .engines import search_engines_dict
 from . import output as out
+from . import utils
 from . import config as cfg
 
 
@@ -11,8 +12,8 @@ class MultipleSearchEngines(object):
     def __init__(self, engines, proxy=cfg.PROXY, timeout=cfg.TIMEOUT, language='en', country='', safe_search='moderate', proxy_verify_ssl=True):
         self._engines = [
             se(proxy, timeout, language, country, safe_search, proxy_verify_ssl) 
-            for se in search_engines_dict.values() 
-            if se.__name__.lower() in engines
+            for name, se in search_engines_dict.items() 
+            if name in engines
         ]
         self._filter = None
 
@@ -72,26 +73,32 @@ class MultipleSearchEngines(object):
 
     async def search(self, query, pages=cfg.SEARCH_ENGINE_RESULTS_PAGES):
         '''Searches multiple engines in parallel and collects the results.'''
+        seen_links = set(utils.normalize_url(link) for link in self.results.links())
+        seen_hosts = set(self.results.hosts())
+
         async def run_engine(engine):
             engine, engine_results = await self._search_single_engine(engine, query, pages)
             
             if self.ignore_duplicate_urls or self.ignore_duplicate_domains:
                 for item in engine_results._results:
-                    is_duplicate = False
-                    if self.ignore_duplicate_urls and item['link'] in self.results.links():
-                        is_duplicate = True
-                    if self.ignore_duplicate_domains and item['host'] in self.results.hosts():
-                        is_duplicate = True
-                    
-                    if not is_duplicate:
-                        self.results.append(item)
+                    link = utils.normalize_url(item['link'])
+                    if self.ignore_duplicate_urls and link in seen_links:
+                        continue
+                    if self.ignore_duplicate_domains and item['host'] in seen_hosts:
+                        continue
+                    self.results.append(item)
+                    seen_links.add(link)
+                    seen_hosts.add(item['host'])
             else:
                 self.results._results += engine_results._results
 
             if engine.is_banned:
                 self.banned_engines.append(engine.__class__.__name__)
         
-        await asyncio.gather(*[run_engine(e) for e in self._engines], return_exceptions=True)
+        outcomes = await asyncio.gather(*[run_engine(e) for e in self._engines], return_exceptions=True)
+        for engine, outcome in zip(self._engines, outcomes):
+            if isinstance(outcome, Exception):
+                out.console('{} failed: {}'.format(engine.__class__.__name__, outcome), level=out.Level.error)
         
         return self.results
     
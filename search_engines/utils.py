@@ -1,4 +1,5 @@
 import requests
+from urllib.parse import urlsplit, urlunsplit
 from .config import PYTHON_VERSION
 
 
@@ -19,6 +20,11 @@ def is_url(link):
     parts = requests.utils.urlparse(link)
     return bool(parts.scheme and parts.netloc)
 
+def normalize_url(url):
+    '''Returns URL with lowercase scheme and host and without fragment.'''
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ''))
+
 def domain(url):
     '''Returns domain form URL'''
     host = requests.utils.urlparse(url).netloc
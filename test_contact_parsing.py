@@ -0,0 +1,153 @@
+import os, sys
+sys.path.append(os.getcwd())
+import webui
+
+
+def test_iter_emails_stray_at_before_address():
+    # Одиночная '@' за 230-260 символов до адреса не должна обрезать его домен
+    for gap in range(200, 300):
+        text = 'Write to @company' + ' ' * gap + 'sales@mail.example-company.com ok'
+        for pattern in (webui.EMAIL_RE, webui.FAST_EMAIL_RE):
+            expected = [m.group(0) for m in pattern.finditer(text)]
+            assert [m.group(0) for m in webui.iter_emails(pattern, text)] == expected
+            assert expected == ['sales@mail.example-company.com']
+
+
+SCRIPT_STYLE_PAGE = '''<html><head>
+<script type="application/ld+json">{"@type": "Organization", "telephone": "+7 495 123-45-67"}</script>
+</head><body>
+<style>
+@media (max-width: 600px) { body { margin: 0 } }
+@import url(x.css);
+</style>
+<script>var ts = 1712345678901; var price = "+7 999 111 22 33";</script>
+<noscript>+7 999 222 33 44</noscript>
+<p>Contact us: +7 (495) 765-43-21</p>
+</body></html>'''
+
+
+def _parse_regex_contacts(html):
+    contacts = webui.ContactList()
+    webui._parse_regex(webui.HTMLParser(html), 'https://example.com/', contacts)
+    return contacts
+
+
+def test_regex_scan_skips_script_and_style():
+    contacts = _parse_regex_contacts(SCRIPT_STYLE_PAGE)
+    values = [value for _, value, _ in contacts]
+    assert not [v for v in values if 'media' in v or 'import' in v]
+    assert not [v for v in values if '1712345678901' in v or '999' in v]
+    assert [c for c in contacts if c[0] == 'phone']
+
+
+def test_json_ld_parsed_before_scripts_are_stripped():
+    contacts = webui.ContactList()
+    webui.parse_page_for_contacts(webui.HTMLParser(SCRIPT_STYLE_PAGE), 'https://example.com/', contacts, full_scan=True)
+    assert ('phone', '+7 495 123-45-67', 'https://example.com/') in contacts
+
+
+def test_fast_parser_skips_script_and_style():
+    contacts, _ = webui._parse_page_fast('https://example.com/', SCRIPT_STYLE_PAGE)
+    values = [value for _, value, _ in contacts]
+    assert not [v for v in values if 'media' in v or 'import' in v or '1712345678901' in v]
+
+
+def test_overlapping_phone_patterns_all_found():
+    # Номер подходит под несколько телефонных паттернов - каждый дает свое совпадение
+    contacts = _parse_regex_contacts('<html><body><p>Call +49301234567890 now</p></body></html>')
+    phones = [value for kind, value, _ in contacts if kind == 'phone']
+    assert '+49301234567890' in phones
+
+
+def test_regex_scan_not_skipped_for_contacts_from_earlier_passes():
+    # Быстрый парсер уже нашел email и телефон; в отрендеренном DOM есть только текст с WhatsApp
+    url = 'https://example.com/'
+    found = webui.ContactAccumulator()
+    found.add('email', 'sales@company.ru', url)
+    found.add('phone', '+7 495 123-45-67', url)
+    rendered = '<html><body><p>WhatsApp: wa.me/79991234567</p></body></html>'
+    webui.parse_page_for_contacts(webui.HTMLParser(rendered), url, found, full_scan=False)
+    assert [c for c in found.contacts() if c['type'] == 'messenger']
+
+
+def test_regex_scan_skipped_when_page_has_structured_contacts():
+    url = 'https://example.com/'
+    page = ('<html><body><a href="mailto:sales@company.ru">mail</a><a href="tel:+74951234567">tel</a>'
+            '<p>WhatsApp: wa.me/79991234567</p></body></html>')
+    found = webui.ContactAccumulator()
+    webui.parse_page_for_contacts(webui.HTMLParser(page), url, found, full_scan=False)
+    assert sorted(c['type'] for c in found.contacts()) == ['email', 'phone']
+
+
+def _catalog_page():
+    # 300 позиций каталога с артикулами, похожими на номера и @-упоминания (не проходят проверку),
+    # и настоящие контакты в подвале
+    items = ''.join(f'<li>Part +{i:012d} by @vendor{i}.com </li>' for i in range(300))
+    promo = ''.join('<li>instagram.com/www_promo/</li>' for _ in range(300))
+    footer = ('<footer>Tel: +7 (495) 765-43-21, instagram.com/company_shop/, '
+              'Telegram: @company_support </footer>')
+    return f'<html><body><ul>{items}{promo}</ul>{footer}</body></html>'
+
+
+def test_hit_budget_counts_only_valid_contacts():
+    contacts = _parse_regex_contacts(_catalog_page())
+    assert ('phone', '+74957654321', 'https://example.com/') in contacts
+    assert ('social', 'instagram: company_shop', 'https://example.com/') in contacts
+    assert ('messenger', 'telegram: company_support', 'https://example.com/') in contacts
+
+
+def test_fast_parser_hit_budget_counts_only_valid_contacts():
+    contacts, _ = webui._parse_page_fast('https://example.com/', _catalog_page())
+    assert ('phone', '+74957654321', 'https://example.com/') in contacts
+
+
+def test_hit_budget_limits_valid_contacts_per_pass():
+    page = '<html><body>' + ''.join(f'<p>t.me/channel_{i:03d}/</p>' for i in range(100)) + '</body></html>'
+    contacts = _parse_regex_contacts(page)
+    assert len([c for c in contacts if c[0] == 'messenger']) == webui.MAX_PATTERN_HITS
+
+
+def test_svg_icon_prepass_matches_subtree_search():
+    # Предварительный проход по SVG дает тот же ответ, что и поиск SVG в поддереве каждого предка
+    html = '''<html><body>
+<div class="contacts"><svg class="icon-other"></svg><div><svg aria-label="Phone"></svg></div>
+  <footer><span>+7 495 123-45-67</span></footer></div>
+<div><svg class="icon-phone"></svg><header><a>mail</a></header></div>
+<section><div><svg class="logo"></svg><svg class="icon-mail"></svg></div><p id="plain">text</p></section>
+</body></html>'''
+    tree = webui.HTMLParser(html)
+    svg_icon_ids = webui.collect_svg_icon_ancestors(tree)
+    for node in tree.css('body *'):
+        assert webui.check_contact_icons(node, svg_icon_ids) == webui.check_contact_icons(node)
+    assert webui.check_contact_icons(tree.css_first('header'), svg_icon_ids)
+    assert not webui.check_contact_icons(tree.css_first('footer'), svg_icon_ids)
+    assert not webui.check_contact_icons(tree.css_first('#plain'), svg_icon_ids)
+
+
+def test_analyze_contact_context_detects_svg_icon():
+    html = ('<html><head><title>Контакты</title></head><body>'
+            '<div><svg class="icon-phone"></svg><footer>+7 495 123-45-67</footer></div></body></html>')
+    context = webui.analyze_contact_context(webui.HTMLParser(html), '+7 495 123-45-67')
+    assert context['in_footer'] and context['has_contact_icon'] and context['is_contact_page']
+
+
+def test_scan_stops_when_all_families_exhausted():
+    text = ' '.join(f'instagram.com/shop{i}/' for i in range(200))
+    hits = dict.fromkeys(webui.SOCIAL_PATTERNS, 0)
+    hits.update({network: webui.MAX_PATTERN_HITS for network in hits if network != 'instagram'})
+    scanned = 0
+    for match in webui._iter_open_families(webui.SOCIAL_RE, text, hits):
+        scanned += 1
+        hits[match.lastgroup] += 1
+    assert scanned == webui.MAX_PATTERN_HITS
+
+
+def test_regex_scan_keeps_navigation_links_in_tree():
+    # Дерево страницы переиспользуется для навигационных ссылок - поиск по тексту его не меняет
+    html = ('<html><body><nav><noscript><a href="/contacts">Контакты</a></noscript></nav>'
+            '<script>var x = 1;</script><p>nothing</p></body></html>')
+    for parse in (lambda tree: webui._parse_regex(tree, 'https://example.com/', webui.ContactList()),
+                  lambda tree: webui._parse_page_with_selectolax(html, 'https://example.com/', webui.ContactList())):
+        tree = webui.HTMLParser(html)
+        tree = parse(tree) or tree
+        assert 'https://example.com/contacts' in webui._extract_navigation_links_selectolax(tree, 'https://example.com/')
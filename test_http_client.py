@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.append(os.getcwd())
+
+from search_engines import http_client
+from search_engines.http_client import HttpClient
+
+
+async def _cookie_pages():
+    # Согласие ставит cookie на редиректе, страницы выдачи требуют ее
+    async def consent(request):
+        response = web.HTTPFound('/page?n=1')
+        response.set_cookie('consent', request.query['user'])
+        raise response
+
+    async def page(request):
+        return web.Response(text='consent=' + request.cookies.get('consent', ''))
+
+    app = web.Application()
+    app.router.add_get('/consent', consent)
+    app.router.add_get('/page', page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    # localhost, а не IP: cookies с IP-адресов CookieJar aiohttp не сохраняет
+    return runner, f'http://localhost:{port}'
+
+
+def test_cookies_kept_per_search_on_shared_session():
+    async def run():
+        runner, base = await _cookie_pages()
+        await http_client.open_shared_session()
+        try:
+            first, second = HttpClient(proxy=None), HttpClient(proxy=None)
+            # Cookie с редиректа доходит до следующих страниц той же выдачи
+            assert (await first.get(base + '/consent?user=a')).html == 'consent=a'
+            assert (await first.get(base + '/page?n=2')).html == 'consent=a'
+            # Другой поиск на тех же общих соединениях cookie первого не видит
+            assert (await second.get(base + '/page?n=2')).html == 'consent='
+            assert first.session.connector is second.session.connector is http_client._get_shared_session().connector
+            await first.close()
+            await second.close()
+            # Закрытие клиента не закрывает общий пул
+            assert not http_client._get_shared_session().connector.closed
+        finally:
+            await http_client.close_shared_session()
+            await runner.cleanup()
+
+    asyncio.run(run())
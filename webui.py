@@ -1,37 +1,61 @@
 #!/usr/bin/env python3
 # -*- encoding: utf-8 -*-
 import asyncio
+import atexit
+import hashlib
+import heapq
 import json
 import os
 import re
-from flask import Flask, render_template, request, jsonify, send_from_directory
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain, zip_longest
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import urljoin, urlparse, urlsplit, urlunparse
 
 # Используем Playwright для рендеринга JavaScript
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+
+# HTML-парсер selectolax на движке Lexbor - и для быстрого парсинга, и для страниц из Playwright.
+# В selectolax 1.0 старый модуль selectolax.parser (Modest) удален
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    from selectolax.parser import HTMLParser
 
 # Быстрый парсер для статических сайтов
 try:
     import httpx
-    from selectolax.parser import HTMLParser
     FAST_PARSER_AVAILABLE = True
-    print("✅ httpx и selectolax успешно импортированы")
+    print("✅ httpx успешно импортирован")
 except ImportError as e:
     FAST_PARSER_AVAILABLE = False
-    print(f"Warning: httpx и selectolax не установлены. Используем только Playwright. Ошибка: {e}")
+    print(f"Warning: httpx не установлен. Используем только Playwright. Ошибка: {e}")
+
+# orjson разбирает и сериализует JSON в несколько раз быстрее stdlib json.
+# orjson.JSONDecodeError - подкласс json.JSONDecodeError, поэтому обработка ошибок общая
+try:
+    import orjson
+    json_loads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    json_loads = json.loads
+    ORJSON_AVAILABLE = False
 
 try:
     from search_engines.engines import search_engines_dict
     from search_engines.multiple_search_engines import MultipleSearchEngines, AllSearchEngines
     from search_engines import config
+    from search_engines.http_client import open_shared_session, close_shared_session
 except ImportError as e:
     msg = '"{}"\nPlease install `search_engines` to resolve this error.'
     raise ImportError(msg.format(str(e)))
 
 try:
-    from search_engines.ai_expander import AIQueryExpander
+    from search_engines.ai_expander import AIQueryExpander, OllamaManager
     AI_EXPANDER_AVAILABLE = True
     print("✅ AI Query Expander доступен")
 except ImportError as e:
@@ -47,11 +71,16 @@ except ImportError as e:
     print(f"Warning: AI agent not available: {e}")
 
 # Функции валидации контактов
-FAKE_EMAIL_DOMAINS = [
+FAKE_EMAIL_DOMAINS = frozenset([
     '10minutemail', 'tempmail', 'guerrillamail', 'mailinator', 'throwaway',
     'example.com', 'test.com', 'domain.com', 'email.com', 'yourdomain.com',
     'fakeemail', 'noemail', 'nomail', 'notvalid'
-]
+])
+# Все подстроки одним проходом по домену вместо цикла по списку
+FAKE_EMAIL_RE = re.compile('|'.join(map(re.escape, sorted(FAKE_EMAIL_DOMAINS))))
+
+# Разделители в номере телефона (пробелы убираются отдельно через split)
+PHONE_SEPARATORS_TABLE = str.maketrans('', '', '-().+')
 
 def is_valid_phone(phone: str) -> bool:
     """Проверяет, является ли строка валидным номером телефона"""
@@ -60,10 +89,10 @@ def is_valid_phone(phone: str) -> bool:
     
     original = phone
     # Убираем все пробелы и дефисы
-    digits = re.sub(r'[\s\-\(\)\.\+]', '', phone)
+    digits = ''.join(phone.split()).translate(PHONE_SEPARATORS_TABLE)
     
-    # Должны быть только цифры и возможно один +
-    if not re.match(r'^\+?\d+$', digits):
+    # Должны остаться только цифры
+    if not digits.isdecimal():
         return False
     
     # Убираем ведущий +
@@ -79,7 +108,7 @@ def is_valid_phone(phone: str) -> bool:
         return False
     
     # Фильтруем годы (2020-2029)
-    if re.match(r'^20[2-9]\d$', digits_only):
+    if len(digits_only) == 4 and digits_only.startswith('20') and digits_only[2] in '23456789':
         return False
     
     # Фильтруем последовательности типа 111111, 123456 и т.д.
@@ -113,46 +142,50 @@ BLOCKED_PATTERNS = [
     'kaktusi', 'natisni', 'tisak', 'tiskanje', 'printanje'
 ]
 
+# Без учета регистра - чтобы не создавать lower()-копии заголовка, описания и URL на каждый результат
+BLOCKED_DOMAIN_RE = re.compile('|'.join(map(re.escape, BLOCKED_DOMAINS)), re.IGNORECASE)
+BLOCKED_PATTERN_RE = re.compile('|'.join(map(re.escape, BLOCKED_PATTERNS)), re.IGNORECASE)
+# Азиатские доменные зоны, отсекаемые при строгой фильтрации (с завершающим слешем или без)
+BLOCKED_TLD_RE = re.compile(r'\.(?:cn|jp|kr|tw|hk)/?$', re.IGNORECASE)
+
+CHINESE_RE = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff]')
+JAPANESE_RE = re.compile(r'[\u3040-\u309f\u30a0-\u30ff]')
+CYRILLIC_RE = re.compile(r'[а-яё]')
+ENGLISH_RE = re.compile(r'[a-z]')
+
 def is_valid_search_result(title, url, description, query_language='ru', strict_filter=False):
     """Проверяет релевантность результата поиска"""
-    title_lower = title.lower()
-    url_lower = url.lower()
-    desc_lower = description.lower()
-    
     # Если строгая фильтрация отключена - проверяем только явный спам
     if not strict_filter:
-        # Проверка на заблокированные домены (только явный спам)
-        for blocked in BLOCKED_DOMAINS:
-            if blocked in url_lower:
-                return False
+        # Проверка на заблокированные домены (только явный спам) - самая дешевая, поэтому первой
+        if BLOCKED_DOMAIN_RE.search(url):
+            return False
         
         # Проверка на заблокированные паттерны (только явный спам)
-        for pattern in BLOCKED_PATTERNS:
-            if pattern in title_lower or pattern in desc_lower:
-                return False
+        if BLOCKED_PATTERN_RE.search(title) or BLOCKED_PATTERN_RE.search(description):
+            return False
         
         return True  # При нестрогом режиме пропускаем всё остальное
     
     # Строгая фильтрация для русского запроса
     if query_language == 'ru':
         # Проверка на китайские/азиатские символы в заголовке
-        chinese_chars = re.findall(r'[\u4e00-\u9fff\u3400-\u4dbf\uf900-\ufaff]', title)
+        chinese_chars = CHINESE_RE.findall(title)
         if len(chinese_chars) > 5:  # Увеличил порог
             return False
         
         # Проверка на японские символы
-        japanese_chars = re.findall(r'[\u3040-\u309f\u30a0-\u30ff]', title)
+        japanese_chars = JAPANESE_RE.findall(title)
         if len(japanese_chars) > 4:  # Увеличил порог
             return False
         
         # Фильтруем сайты с азиатскими доменами, если нет кириллицы И нет английского
-        cyrillic_chars = re.findall(r'[а-яё]', title + ' ' + description)
-        english_chars = re.findall(r'[a-z]', title + ' ' + description)
+        cyrillic_chars = CYRILLIC_RE.findall(title + ' ' + description)
+        english_chars = ENGLISH_RE.findall(title + ' ' + description)
         
         if len(cyrillic_chars) < 1 and len(english_chars) < 5:  # Если нет кириллицы и мало английского
-            for tld in ['.cn', '.jp', '.kr', '.tw', '.hk']:
-                if url_lower.endswith(tld + '/') or url_lower.endswith(tld):
-                    return False
+            if BLOCKED_TLD_RE.search(url):
+                return False
     
     return True
 
@@ -184,7 +217,7 @@ def is_valid_email(email: str) -> bool:
         return False
     
     # Проверка на временные email сервисы
-    if any(fake in domain for fake in FAKE_EMAIL_DOMAINS):
+    if domain in FAKE_EMAIL_DOMAINS or FAKE_EMAIL_RE.search(domain):
         return False
     
     # Базовая проверка структуры
@@ -241,40 +274,60 @@ def enhanced_confidence_score(contact_type: str, value: str, context: dict, url:
     return min(score, 1.0)
 
 # Иконки контактов для анализа
-CONTACT_ICON_CLASSES = [
+CONTACT_ICON_CLASSES = frozenset([
     'fa-phone', 'fa-envelope', 'fa-mobile', 'fa-phone-square',
     'icon-phone', 'phone-icon', 'contact-icon',
     'fa-whatsapp', 'fa-telegram', 'fa-viber', 'fa-skype',
     'fa-instagram', 'fa-facebook', 'fa-twitter', 'fa-linkedin',
     'fa-youtube', 'fa-tiktok'
-]
-
-def check_contact_icons(element) -> bool:
+])
+CONTACT_ICON_RE = re.compile('|'.join(map(re.escape, sorted(CONTACT_ICON_CLASSES))))
+SVG_ICON_RE = re.compile(r'phone|mail|contact|envelope|whatsapp|telegram')
+
+def collect_svg_icon_ancestors(tree) -> set:
+    """Один проход по всем SVG страницы: mem_id элементов, у которых первая вложенная SVG - иконка контакта"""
+    first_svg = {}
+    for svg in tree.css('svg'):
+        svg_classes = (svg.attributes.get('class') or '').lower()
+        svg_aria = (svg.attributes.get('aria-label') or '').lower()
+        is_icon = SVG_ICON_RE.search(svg_classes + ' ' + svg_aria) is not None
+        # SVG идут в порядке документа, поэтому первая записанная для предка - его css_first('svg')
+        node = svg.parent
+        while node is not None and node.mem_id not in first_svg:
+            first_svg[node.mem_id] = is_icon
+            node = node.parent
+    return {mem_id for mem_id, is_icon in first_svg.items() if is_icon}
+
+def check_contact_icons(element, svg_icon_ids=None) -> bool:
     """Проверяет иконки рядом с контактом в родительских элементах"""
     if element is None:
         return False
     
     parent = element.parent
-    while parent and parent.name != 'body':
-        classes = ' '.join(parent.get('class', [])).lower()
-        attrs = ' '.join(parent.get('aria-label', '')).lower()
+    while parent is not None and parent.tag != 'body':
+        classes = (parent.attributes.get('class') or '').lower()
+        attrs = (parent.attributes.get('aria-label') or '').lower()
         
-        if any(icon in classes or icon in attrs for icon in CONTACT_ICON_CLASSES):
+        if CONTACT_ICON_RE.search(classes + ' ' + attrs):
             return True
         
-        # Проверка на SVG иконки
-        svg = parent.find('svg')
-        if svg:
-            svg_classes = ' '.join(svg.get('class', [])).lower()
-            svg_aria = svg.get('aria-label', '').lower()
-            if any(icon in svg_classes or icon in svg_aria for icon in ['phone', 'mail', 'contact', 'envelope', 'whatsapp', 'telegram']):
+        # Проверка на SVG иконки: по заранее собранному множеству, иначе поиском в поддереве
+        if svg_icon_ids is not None:
+            if parent.mem_id in svg_icon_ids:
                 return True
+        else:
+            svg = parent.css_first('svg')
+            if svg is not None:
+                svg_classes = (svg.attributes.get('class') or '').lower()
+                svg_aria = (svg.attributes.get('aria-label') or '').lower()
+                if SVG_ICON_RE.search(svg_classes + ' ' + svg_aria):
+                    return True
         
         parent = parent.parent
     
     return False
 
-def analyze_contact_context(soup, contact_value: str) -> dict:
+def analyze_contact_context(tree, contact_value: str) -> dict:
     """Анализ контекста вокруг контакта"""
     context = {
         'in_footer': False,
@@ -285,96 +338,201 @@ def analyze_contact_context(soup, contact_value: str) -> dict:
         'url_depth': 0
     }
     
-    if soup is None:
+    if tree is None:
         return context
     
+    # Текст footer/header/title извлекается один раз - без сериализации поддерева в HTML
+    footer = tree.css_first('footer')
+    header = tree.css_first('header')
+    title = tree.css_first('title')
+    footer_text = footer.text() if footer is not None else ''
+    header_text = header.text() if header is not None else ''
+    title_text = title.text() if title is not None else ''
+    svg_icon_ids = None
+    
     # Проверка нахождения в footer
-    footer = soup.find('footer')
-    if footer and contact_value in str(footer):
+    if footer_text and contact_value in footer_text:
+        svg_icon_ids = collect_svg_icon_ancestors(tree)
         context['in_footer'] = True
-        context['has_contact_icon'] = check_contact_icons(footer)
+        context['has_contact_icon'] = check_contact_icons(footer, svg_icon_ids)
     
     # Проверка нахождения в header
-    header = soup.find('header')
-    if header and contact_value in str(header):
+    if header_text and contact_value in header_text:
+        if svg_icon_ids is None:
+            svg_icon_ids = collect_svg_icon_ancestors(tree)
         context['in_header'] = True
-        context['has_contact_icon'] = check_contact_icons(header)
+        context['has_contact_icon'] = check_contact_icons(header, svg_icon_ids)
     
     # Проверка URL страницы на наличие contact
-    if soup.base and 'contact' in soup.base.get('href', '').lower():
+    base = tree.css_first('base')
+    if base is not None and 'contact' in (base.attributes.get('href') or '').lower():
         context['is_contact_page'] = True
     
     # Проверка title страницы
-    title = soup.find('title')
-    if title and title.text:
-        if 'contact' in title.text.lower() or 'контакт' in title.text.lower():
+    if title_text:
+        if 'contact' in title_text.lower() or 'контакт' in title_text.lower():
             context['is_contact_page'] = True
     
     return context
 
-def normalize_contacts(found_contacts: set) -> list:
-    """Нормализация и дедупликация контактов"""
-    normalized = {}
+# Все, кроме ASCII-цифр и '+', - общий ключ нормализации телефонов
+PHONE_STRIP_RE = re.compile(r'[^0-9+]')
+
+def contact_key(contact_type: str, value: str) -> str:
+    """Нормализованный ключ дедупликации контакта"""
+    normalized_value = value.lower().strip()
     
-    for contact_type, value, source_url in found_contacts:
-        # Нормализация телефонов
-        if contact_type == 'phone':
-            digits = re.sub(r'[^\d+]', '', value)
-            if digits.startswith('+'):
-                key = f"phone:{digits}"
-            else:
-                key = f"phone:+{digits}"
-        # Нормализация email
-        elif contact_type == 'email':
-            key = f"email:{value.lower()}"
-        # Социальные сети и мессенджеры
-        else:
-            key = f"{contact_type}:{value.lower()}"
-        
-        if key not in normalized:
-            normalized[key] = {
+    # Для телефонов: убираем все не-цифры кроме +
+    if contact_type == 'phone':
+        return PHONE_STRIP_RE.sub('', normalized_value)
+    # Для email: достаточно нижнего регистра
+    if contact_type == 'email':
+        return normalized_value
+    # Для мессенджеров с номером: оставляем только цифры номера
+    if contact_type == 'messenger' and normalized_value.startswith(('whatsapp:', 'viber:')):
+        number_part = normalized_value.split(':', 1)[1].strip()
+        return f"messenger:{PHONE_STRIP_RE.sub('', number_part)}"
+    return f"{contact_type}:{normalized_value}"
+
+def clean_contact_value(contact_type: str, value: str) -> str:
+    """Значение контакта в том виде, в каком оно отдается клиенту"""
+    # Очистка от URL encoding и лишних пробелов
+    clean_value = value.replace('%20', ' ').strip()
+    # Дополнительная очистка телефонов
+    if contact_type == 'phone':
+        # Убираем множественные пробелы и форматируем
+        phone = ' '.join(clean_value.split())
+        # После схлопывания между 8 и скобкой остается не больше одного пробела
+        if phone.startswith(('8(', '8 (')):
+            phone = '+7 (' + phone.partition('(')[2]  # 8 (...) -> +7 (...)
+        clean_value = phone
+    return clean_value
+
+class ContactAccumulator:
+    """Контакты, дедуплицированные прямо при добавлении по ключу
+    (сущность источника, нормализованное значение). Для каждого ключа хранится
+    первый найденный контакт, уже очищенный и готовый к ответу"""
+    def __init__(self, entity_of=None):
+        # Источник -> сущность; без сопоставления все контакты относятся к одной сущности None
+        self._entity_of = entity_of or (lambda source_url: None)
+        self._entries = {}
+    
+    def add(self, contact_type: str, value: str, source_url: str):
+        entity_id = self._entity_of(source_url)
+        key = (entity_id, contact_key(contact_type, value))
+        if key not in self._entries:
+            self._entries[key] = {
                 'type': contact_type,
-                'value': value,
-                'sources': [source_url]
+                'value': clean_contact_value(contact_type, value),
+                'source': source_url,
+                'entity_id': entity_id
             }
-        elif source_url not in normalized[key]['sources']:
-            normalized[key]['sources'].append(source_url)
     
-    return list(normalized.values())
+    def __len__(self):
+        return len(self._entries)
+    
+    def contacts(self):
+        return list(self._entries.values())
 
 app = Flask(__name__)
 CORS(app)
 
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-app.config['TEMPLATES_AUTO_RELOAD'] = True
+# В продакшене шаблоны не перечитываются, а страницы отдаются из кэша
+app.config['TEMPLATES_AUTO_RELOAD'] = os.environ.get('FLASK_ENV') != 'production'
 
 working_engines = {k: v for k, v in search_engines_dict.items()
                    if k in ['bing', 'yahoo', 'aol', 'duckduckgo', 'startpage', 'ecosia']}
 
+# Постоянный event loop в фоновом потоке - общий для всех запросов.
+# Соединения с поисковиками (DNS, TCP, TLS) живут в общей сессии и
+# переиспользуются между запросами вместо установки заново.
+# Цикл запускается при первом запросе, а не при импорте, и отдельно в каждом процессе:
+# после fork (gunicorn --preload) потока родительского цикла в воркере нет
+_async_loop = None
+_async_loop_pid = None
+_async_loop_lock = threading.Lock()
+
+def _get_async_loop():
+    """Возвращает общий event loop этого процесса, запуская его при первом обращении"""
+    global _async_loop, _async_loop_pid
+    with _async_loop_lock:
+        if _async_loop is None or _async_loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='async-loop', daemon=True).start()
+            # Без ожидания: задачи цикла стартуют по порядку, сессия откроется раньше первого запроса
+            asyncio.run_coroutine_threadsafe(open_shared_session(), loop)
+            _async_loop, _async_loop_pid = loop, os.getpid()
+        return _async_loop
+
+def _run_async(coro):
+    """Выполняет корутину в общем event loop и возвращает результат"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_async_loop()).result()
+
+def _run_async_at_exit(coroutine_function):
+    """Для atexit: выполняет корутину, только если общий цикл запущен в этом процессе"""
+    if _async_loop is not None and _async_loop_pid == os.getpid():
+        _run_async(coroutine_function())
+
+def _run_isolated(coro):
+    """Выполняет корутину в собственном event loop запроса.
+    
+    Для агента: он делает блокирующие вызовы (httpx.Client к Ollama, ожидание
+    её запуска через time.sleep) и в общем цикле заморозил бы /search и /parse_contacts.
+    asyncio.run при завершении отменяет оставшиеся задачи и закрывает асинхронные генераторы и executor"""
+    return asyncio.run(coro)
+
+atexit.register(_run_async_at_exit, close_shared_session)
+
+# Отрендеренные страницы: шаблоны зависят только от working_engines,
+# который не меняется после запуска
+_page_cache = {}
+
+def _render_page(template):
+    """Отдает страницу из кэша с ETag, чтобы браузер получал 304 при повторных заходах"""
+    if app.config['TEMPLATES_AUTO_RELOAD']:
+        return render_template(template, engines=working_engines)
+    
+    cached = _page_cache.get(template)
+    if cached is None:
+        body = render_template(template, engines=working_engines).encode('utf-8')
+        cached = _page_cache[template] = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+    
+    body, etag = cached
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
-    return render_template('home.html', engines=working_engines)
+    return _render_page('home.html')
 
 @app.route('/Scraper')
 def scraper():
-    return render_template('scraper.html', engines=working_engines)
+    return _render_page('scraper.html')
 
 @app.route('/Chat')
 def chat():
-    return render_template('chat.html', engines=working_engines)
+    return _render_page('chat.html')
 
 @app.route('/Contacts')
 def contacts():
-    return render_template('contacts.html', engines=working_engines)
+    return _render_page('contacts.html')
 
 @app.route('/search', methods=['POST'])
 def search():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         query = data.get('query', '')
         engines = data.get('engines', ['yahoo'])
         num_results = data.get('num_results')
         pages = int(data.get('pages', 1))
+        # Улучшенные настройки для русского поиска
+        language = data.get('language', 'ru')
+        country = data.get('country', 'ru')
+        safe_search = data.get('safe_search', 'moderate')
+        ignore_duplicates = data.get('ignore_duplicates', False)
+        strict_filter = data.get('strict_filter', False)  # По умолчанию нестрогая фильтрация
 
         if isinstance(engines, str):
             engines = [e.strip().lower() for e in engines.split(',') if e.strip()]
@@ -388,31 +546,25 @@ def search():
             return jsonify({'success': False, 'error': 'Query is required'}), 400
         
         # Initialize search engine
-        # Улучшенные настройки для русского поиска
-        language = data.get('language', 'ru')
-        country = data.get('country', 'ru')
-        
         search_engine = MultipleSearchEngines(
             engines=engines,
             language=language,
             country=country,
-            safe_search=data.get('safe_search', 'moderate')
+            safe_search=safe_search
         )
         
         # Configure duplicate filtering based on user preference
-        search_engine.ignore_duplicate_urls = data.get('ignore_duplicates', False)
-        search_engine.ignore_duplicate_domains = data.get('ignore_duplicates', False)
+        search_engine.ignore_duplicate_urls = ignore_duplicates
+        search_engine.ignore_duplicate_domains = ignore_duplicates
         
         # Perform search
         results = []
         async def perform_search():
-            return await search_engine.search(query, pages=pages)
+            async with search_engine as engine:
+                return await engine.search(query, pages=pages)
         
-        # Run async search
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        search_results = loop.run_until_complete(perform_search())
-        loop.close()
+        # Run async search on the shared event loop
+        search_results = _run_async(perform_search())
         
         # Format results and limit by num_results
         # We want to show results from multiple engines if possible, so we'll take them from the list
@@ -425,29 +577,19 @@ def search():
         # is to interleave them.
         
         raw_results = search_results._results
-        engines_used = list(set(r.get('engine') for r in raw_results))
-        interleaved_results = []
         
-        # Optimized interleaving logic
-        # Group results by engine
-        engine_bins = {eng: [r for r in raw_results if r.get('engine') == eng] for eng in engines_used}
+        # Group results by engine in a single pass (engines keep first-seen order)
+        engine_bins = defaultdict(list)
+        for r in raw_results:
+            engine_bins[r.get('engine')].append(r)
         
-        # Max results to collect is either total available or num_results
-        max_total = len(raw_results)
+        # Take results round-robin: first of each engine, then second, and so on
         max_limit = num_results if num_results and num_results > 0 else None
-        
-        for i in range(max_total):
-            added_in_this_round = 0
-            for eng in engines_used:
-                if i < len(engine_bins[eng]):
-                    interleaved_results.append(engine_bins[eng][i])
-                    added_in_this_round += 1
-                if max_limit and len(interleaved_results) >= max_limit:
-                    break
-            if max_limit and len(interleaved_results) >= max_limit:
-                break
-            if added_in_this_round == 0: # Should not happen if i < max_total but for safety
-                break
+        interleaved_results = [
+            r for r in chain.from_iterable(zip_longest(*engine_bins.values())) if r is not None
+        ]
+        if max_limit:
+            interleaved_results = interleaved_results[:max_limit]
         
         for result in interleaved_results:
             title = result.get('title', '')
@@ -455,7 +597,6 @@ def search():
             description = result.get('text', '')
             
             # Применяем фильтрацию результатов с учетом языка и опции строгой фильтрации
-            strict_filter = data.get('strict_filter', False)  # По умолчанию нестрогая фильтрация
             if is_valid_search_result(title, url, description, language, strict_filter):
                 results.append({
                     'title': title,
@@ -499,17 +640,20 @@ def export_contacts():
             filepath = os.path.join('exports', filename)
             
             import csv
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(['Type', 'Value', 'Source'])
-                for contact in contacts:
-                    writer.writerow([contact['type'], contact['value'], contact['source']])
+                writer.writerows((contact['type'], contact['value'], contact['source']) for contact in contacts)
         else:
             filename = f'contacts_{timestamp}.json'
             filepath = os.path.join('exports', filename)
             
-            with open(filepath, 'w', encoding='utf-8') as jsonfile:
-                json.dump(contacts, jsonfile, ensure_ascii=False, indent=2)
+            if ORJSON_AVAILABLE:
+                with open(filepath, 'wb') as jsonfile:
+                    jsonfile.write(orjson.dumps(contacts, option=orjson.OPT_INDENT_2))
+            else:
+                with open(filepath, 'w', encoding='utf-8') as jsonfile:
+                    json.dump(contacts, jsonfile, ensure_ascii=False, indent=2)
         
         return jsonify({
             'success': True,
@@ -527,21 +671,67 @@ def download_file(filename):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 404
 
+def _load_static_asset(filename):
+    """Читает статический файл в память один раз при запуске"""
+    try:
+        with open(os.path.join(app.root_path, 'static', filename), 'rb') as f:
+            body = f.read()
+    except OSError:
+        return None
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+_favicon = _load_static_asset('favicon.ico')
+
 @app.route('/favicon.ico')
 def favicon():
-    return send_from_directory('static', 'favicon.ico', mimetype='image/vnd.microsoft.icon')
+    if _favicon is None:
+        return send_from_directory('static', 'favicon.ico', mimetype='image/vnd.microsoft.icon')
+    
+    # Браузеры запрашивают favicon на каждой странице - отдаем из памяти и кэшируем на сутки
+    body, etag = _favicon
+    response = Response(body, mimetype='image/vnd.microsoft.icon')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response.make_conditional(request)
 
 @app.route('/static/<path:filename>')
 def static_files(filename):
     return send_from_directory('static', filename)
 
 
+# Экземпляры AIQueryExpander переиспользуются между запросами (по одному на пару url/модель).
+# url и модель приходят от клиента, поэтому кэш ограничен: при переполнении вытесняется
+# экземпляр, который дольше всех не запрашивался.
+# Локальной Ollama управляет один общий OllamaManager: он помнит PID запущенной им Ollama
+# (и /api/ai-stop может ее остановить) независимо от вытеснения экземпляров
+MAX_EXPANDERS = 16
+_expanders = {}
+_expanders_lock = threading.Lock()
+_ollama_manager = None
+
+def _get_expander(ollama_url=None, model=None):
+    global _ollama_manager
+    ollama_url = ollama_url or AIQueryExpander.DEFAULT_OLLAMA_URL
+    model = model or AIQueryExpander.DEFAULT_MODEL
+    key = (ollama_url, model)
+    with _expanders_lock:
+        if _ollama_manager is None:
+            _ollama_manager = OllamaManager()
+        expander = _expanders.pop(key, None)
+        if expander is None:
+            expander = AIQueryExpander(ollama_url=ollama_url, model=model, ollama_manager=_ollama_manager)
+            if len(_expanders) >= MAX_EXPANDERS:
+                del _expanders[next(iter(_expanders))]
+        _expanders[key] = expander  # В конец словаря - как самый свежий
+    return expander
+
+
 @app.route('/api/ai-status', methods=['GET'])
 def ai_status():
     if not AI_EXPANDER_AVAILABLE:
         return jsonify({'available': False, 'error': 'AI module not available'}), 500
     
-    expander = AIQueryExpander()
+    expander = _get_expander()
     status = expander.check_connection()
     manager_status = expander.ollama_manager.get_status()
     
@@ -565,16 +755,16 @@ def ai_expand():
     data = request.get_json()
     query = data.get('query', '')
     mode = data.get('mode', 'both')
-    model = data.get('model', 'llama3.1:8b')
-    ollama_url = data.get('ollama_url', 'http://localhost:11434')
+    model = data.get('model', AIQueryExpander.DEFAULT_MODEL)
+    ollama_url = data.get('ollama_url', AIQueryExpander.DEFAULT_OLLAMA_URL)
     auto_start = data.get('auto_start', True)
     auto_stop = data.get('auto_stop', True)
     
     if not query:
         return jsonify({'success': False, 'error': 'Query is required'}), 400
     
-    expander = AIQueryExpander(ollama_url=ollama_url, model=model)
-    expander.set_auto_stop(auto_stop)
+    # auto_stop относится только к этому запросу - общий экземпляр не меняем
+    expander = _get_expander(ollama_url, model)
     
     result = expander.expand_query(query, mode, auto_start=auto_start)
     
@@ -589,12 +779,25 @@ def ai_stop():
     if not AI_EXPANDER_AVAILABLE:
         return jsonify({'success': False, 'error': 'AI module not available'}), 500
     
-    expander = AIQueryExpander()
-    result = expander.ollama_manager.stop()
+    # Останавливаем Ollama через общий менеджер - он помнит PID запущенной им Ollama
+    result = _get_expander().ollama_manager.stop()
     
     return jsonify(result)
 
 
+# Общий HTTP-клиент чата: keep-alive соединение с Ollama переиспользуется между сообщениями
+_chat_client = None
+_chat_client_lock = threading.Lock()
+
+def _get_chat_client():
+    global _chat_client
+    with _chat_client_lock:
+        if _chat_client is None:
+            _chat_client = httpx.Client(timeout=120, limits=httpx.Limits(max_keepalive_connections=20))
+            atexit.register(_chat_client.close)
+    return _chat_client
+
+
 @app.route('/api/chat', methods=['POST'])
 def chat_message():
     if not AI_EXPANDER_AVAILABLE:
@@ -602,8 +805,8 @@ def chat_message():
     
     data = request.get_json()
     message = data.get('message', '')
-    model = data.get('model', 'llama3.1:8b')
-    ollama_url = data.get('ollama_url', 'http://localhost:11434')
+    model = data.get('model', AIQueryExpander.DEFAULT_MODEL)
+    ollama_url = data.get('ollama_url', AIQueryExpander.DEFAULT_OLLAMA_URL)
     history = data.get('history', [])
     
     if not message:
@@ -612,7 +815,7 @@ def chat_message():
     try:
         import httpx
         
-        expander = AIQueryExpander(ollama_url=ollama_url, model=model)
+        expander = _get_expander(ollama_url, model)
         
         if not expander.ollama_manager.is_running():
             start_result = expander.ollama_manager.start()
@@ -633,31 +836,30 @@ def chat_message():
 Пользователь: {message}
 Ассистент:"""
 
-        with httpx.Client(timeout=120) as client:
-            response = client.post(
-                f"{ollama_url}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "num_predict": 2048
-                    }
+        response = _get_chat_client().post(
+            f"{ollama_url}/api/generate",
+            json={
+                "model": model,
+                "prompt": prompt,
+                "stream": False,
+                "options": {
+                    "temperature": 0.7,
+                    "num_predict": 2048
                 }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return jsonify({
-                    'success': True,
-                    'response': data.get('response', '').strip()
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': f'Ollama error: {response.status_code}'
-                }), 500
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            return jsonify({
+                'success': True,
+                'response': data.get('response', '').strip()
+            })
+        else:
+            return jsonify({
+                'success': False,
+                'error': f'Ollama error: {response.status_code}'
+            }), 500
                 
     except httpx.ConnectError:
         return jsonify({'success': False, 'error': 'Cannot connect to Ollama'}), 500
@@ -665,85 +867,118 @@ def chat_message():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-def _parse_json_ld(soup, source_url, found_contacts):
+# Ключи JSON-LD, которые разбираются явно и не требуют общего обхода
+JSON_LD_HANDLED_KEYS = frozenset(['@type', '@context', 'email', 'telephone', 'address', 'contactPoint', 'sameAs'])
+JSON_LD_SOCIAL_NETWORKS = ('instagram', 'facebook', 'linkedin', 'twitter', 'youtube', 'tiktok')
+JSON_LD_SOCIAL_RE = re.compile('|'.join(JSON_LD_SOCIAL_NETWORKS), re.IGNORECASE)
+
+def _walk_json_ld(root, source_url, found_contacts):
+    """Обход JSON-LD явным стеком вместо рекурсии: порядок - в глубину, как при рекурсивном обходе"""
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            # Email - ищем во всех типах
+            if 'email' in obj:
+                email = obj['email']
+                if isinstance(email, list):
+                    for e in email:
+                        if is_valid_email(str(e)):
+                            found_contacts.add('email', str(e).lower(), source_url)
+                elif is_valid_email(str(email)):
+                    found_contacts.add('email', str(email).lower(), source_url)
+            
+            # Telephone
+            if 'telephone' in obj:
+                phone = obj['telephone']
+                if isinstance(phone, list):
+                    for p in phone:
+                        found_contacts.add('phone', str(p), source_url)
+                else:
+                    found_contacts.add('phone', str(phone), source_url)
+            
+            # SameAs (social links)
+            same_as = obj.get('sameAs')
+            if isinstance(same_as, list):
+                for link in same_as:
+                    # Ссылки - только строки; вложенные объекты сюда не попадают
+                    if not isinstance(link, str):
+                        continue
+                    if JSON_LD_SOCIAL_RE.search(link):
+                        # Сохраняем полный URL
+                        found_contacts.add('social', link, source_url)
+            
+            # Address, ContactPoint и остальные ключи - в стек в обратном порядке,
+            # чтобы снимать их в том же порядке, что и при рекурсии
+            children = []
+            if 'address' in obj:
+                children.append(obj['address'])
+            if 'contactPoint' in obj:
+                children.append(obj['contactPoint'])
+            children.extend(value for key, value in obj.items() if key not in JSON_LD_HANDLED_KEYS)
+            stack.extend(reversed(children))
+        elif isinstance(obj, list):
+            stack.extend(reversed(obj))
+
+def _parse_json_ld(tree, source_url, found_contacts):
     """Расширенный парсинг JSON-LD структурированных данных"""
-    CONTACT_SCHEMA_TYPES = [
-        'Organization', 'Person', 'LocalBusiness', 'Corporation', 
-        'Company', 'ContactPoint', 'PostalAddress'
-    ]
-    
-    for script in soup.find_all('script', type='application/ld+json'):
+    for script in tree.css('script[type="application/ld+json"]'):
+        # Содержимое script - один текстовый узел; пустые и заглушки ({} / []) не разбираем
+        raw = script.text(deep=False).strip()
+        if len(raw) < 3:
+            continue
         try:
-            data = json.loads(script.string)
-
-            def find_contacts_in_json(obj, context_type=None):
-                if isinstance(obj, dict):
-                    # Определяем тип схемы
-                    schema_type = obj.get('@type', context_type)
-                    
-                    # Email - ищем во всех типах
-                    if 'email' in obj:
-                        email = obj['email']
-                        if isinstance(email, list):
-                            for e in email:
-                                if is_valid_email(str(e)):
-                                    found_contacts.add(('email', str(e).lower(), source_url))
-                        elif is_valid_email(str(email)):
-                            found_contacts.add(('email', str(email).lower(), source_url))
-                    
-                    # Telephone
-                    if 'telephone' in obj:
-                        phone = obj['telephone']
-                        if isinstance(phone, list):
-                            for p in phone:
-                                found_contacts.add(('phone', str(p), source_url))
-                        else:
-                            found_contacts.add(('phone', str(phone), source_url))
-                    
-                    # Address
-                    if 'address' in obj:
-                        find_contacts_in_json(obj['address'], schema_type)
-                    
-                    # ContactPoint
-                    if 'contactPoint' in obj:
-                        find_contacts_in_json(obj['contactPoint'], schema_type)
-                    
-                    # SameAs (social links)
-                    if 'sameAs' in obj:
-                        same_as = obj['sameAs']
-                        if isinstance(same_as, list):
-                            for link in same_as:
-                                link_str = str(link).lower()
-                                # Извлекаем username из URL
-                                for social in ['instagram', 'facebook', 'linkedin', 'twitter', 'youtube', 'tiktok']:
-                                    if social in link_str:
-                                        # Сохраняем полный URL
-                                        found_contacts.add(('social', link, source_url))
-                    
-                    # Рекурсивный обход
-                    for key, value in obj.items():
-                        if key not in ['@type', '@context', 'email', 'telephone', 'address', 'contactPoint', 'sameAs']:
-                            find_contacts_in_json(value, schema_type)
-                            
-                elif isinstance(obj, list):
-                    for item in obj:
-                        find_contacts_in_json(item, context_type)
-
-            find_contacts_in_json(data)
+            data = json_loads(raw)
+            _walk_json_ld(data, source_url, found_contacts)
         except (json.JSONDecodeError, AttributeError):
             continue
 
-def _parse_links(soup, source_url, found_contacts):
-    for a in soup.find_all('a', href=True):
-        href = a['href']
-        if href.startswith('mailto:'):
-            email = href.replace('mailto:', '').strip()
-            found_contacts.add(('email', email, source_url))
-        elif href.startswith('tel:'):
-            phone = href.replace('tel:', '').strip()
-            found_contacts.add(('phone', phone, source_url))
+# Тип контакта по домену ссылки. Поддомены (m.facebook.com, api.whatsapp.com) ищутся по родительскому домену
+LINK_HOST_TYPES = {
+    'instagram.com': 'social', 'facebook.com': 'social', 'linkedin.com': 'social', 'twitter.com': 'social',
+    'x.com': 'social', 'youtube.com': 'social', 'tiktok.com': 'social',
+    'telegram.me': 'messenger', 't.me': 'messenger', 'whatsapp.com': 'messenger', 'wa.me': 'messenger',
+    'viber.com': 'messenger',
+}
+
+def _href_scheme(href):
+    """Схема ссылки в нижнем регистре ('mailto', 'tel', 'https', ...) или ''.
+    Двоеточие ищется только в первых 7 символах - длинные схемы не интересны"""
+    colon = href.find(':', 0, 7)
+    return href[:colon].lower() if colon > 0 else ''
+
+def _link_contact_type(href):
+    """'social' / 'messenger' по хосту ссылки или None. Ссылки без схемы (instagram.com/x, //t.me/x)
+    разбираются как https; относительные пути хоста не имеют и не совпадают"""
+    if '://' not in href:
+        href = 'https:' + href if href.startswith('//') else 'https://' + href
+    try:
+        host = urlsplit(href).hostname
+    except ValueError:
+        return None
+    while host:
+        contact_type = LINK_HOST_TYPES.get(host)
+        if contact_type:
+            return contact_type
+        host = host.partition('.')[2]
+    return None
+
+def _parse_links(tree, source_url, found_contacts):
+    for a in tree.css('a[href]'):
+        href = a.attributes.get('href') or ''
+        scheme = _href_scheme(href)
+        if scheme == 'mailto':
+            email = href[len('mailto:'):].strip()
+            found_contacts.add('email', email, source_url)
+            continue
+        if scheme == 'tel':
+            phone = href[len('tel:'):].strip()
+            found_contacts.add('phone', phone, source_url)
+            continue
+        
+        contact_type = _link_contact_type(href)
         # Поиск социальных сетей в href - сохраняем полную ссылку
-        elif any(social in href.lower() for social in ['instagram.com', 'facebook.com', 'linkedin.com', 'twitter.com', 'x.com', 'youtube.com', 'tiktok.com']):
+        if contact_type == 'social':
             # Нормализуем URL
             full_url = href
             if not full_url.startswith('http'):
@@ -751,198 +986,369 @@ def _parse_links(soup, source_url, found_contacts):
                     full_url = 'https:' + full_url
                 else:
                     full_url = 'https://' + full_url
-            found_contacts.add(('social', full_url, source_url))
+            found_contacts.add('social', full_url, source_url)
         # Поиск мессенджеров в href - сохраняем полную ссылку
-        elif any(messenger in href.lower() for messenger in ['telegram.me', 't.me', 'whatsapp.com', 'wa.me', 'viber.com']):
+        elif contact_type == 'messenger':
             full_url = href
             if not full_url.startswith('http') and not full_url.startswith('//'):
                 full_url = 'https://' + full_url
-            found_contacts.add(('messenger', full_url, source_url))
-
-def _parse_regex(soup, source_url, found_contacts):
-    text = soup.get_text()
-
-    # Улучшенный поиск email с валидацией
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    for email in re.finditer(email_pattern, text):
+            found_contacts.add('messenger', full_url, source_url)
+
+# Ограничения на поиск регулярками по тексту страницы: огромная страница или мусорный блок
+# с тысячами совпадений не должны занимать обработчик надолго. JSON-LD и ссылки не ограничиваются
+MAX_SCAN_TEXT = 500_000  # символов текста страницы
+# Контактов на проход (на семейство - для объединенных регулярок). Считаются только
+# прошедшие проверку: сотни артикулов, похожих на номера, не вытесняют телефон в подвале
+MAX_PATTERN_HITS = 32
+
+@lru_cache(maxsize=None)
+def _pattern_families(pattern):
+    """Семейства именованных групп регулярки (<семейство>_<n> или просто <семейство>)"""
+    return frozenset(name.rsplit('_', 1)[0] for name in pattern.groupindex)
+
+def _iter_open_families(pattern, text, hits):
+    """Совпадения pattern в text, пока хотя бы у одного ее семейства не исчерпан предел в hits.
+    Когда исчерпаны все, проход по тексту прекращается"""
+    families = _pattern_families(pattern)
+    matches = pattern.finditer(text)
+    while any(hits[family] < MAX_PATTERN_HITS for family in families):
+        match = next(matches, None)
+        if match is None:
+            return
+        yield match
+
+# Теги, содержимое которых не является текстом страницы: CSS (@media, @import), JS
+# (числа, строки), шаблоны. JSON-LD к этому моменту уже разобран
+NON_TEXT_TAGS = ['script', 'style', 'noscript', 'template']
+NON_TEXT_SELECTOR = ', '.join(NON_TEXT_TAGS)
+
+def _page_text(tree):
+    """Видимый текст страницы для поиска регулярками. Теги NON_TEXT_TAGS удаляются из копии:
+    исходное дерево потом используется для навигационных ссылок, в том числе из <noscript>"""
+    if not tree.body:
+        return ''
+    if tree.css_first(NON_TEXT_SELECTOR) is not None:
+        tree = tree.clone()
+        tree.strip_tags(NON_TEXT_TAGS)
+    return tree.body.text()[:MAX_SCAN_TEXT]
+
+# Паттерны для поиска контактов в тексте страницы (компилируются один раз)
+# Длины частей ограничены (RFC 5321: local до 64, домен до 255), поэтому на
+# длинных строках без '@' регулярка не уходит в перебор
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+\-]{1,64}@[A-Za-z0-9.\-]{1,255}\.[A-Za-z]{2,24}\b')
+# Максимальная длина email справа от '@' (домен + точка + зона) и запас на проверку границы
+EMAIL_MAX_LOCAL = 64
+EMAIL_MAX_TAIL = 255 + 1 + 24 + 1
+
+def iter_emails(pattern, text):
+    """Ищет email только вокруг символов '@' вместо прохода регуляркой по всему тексту.
+
+    Результат совпадает с pattern.finditer(text): в email ровно одна '@',
+    поэтому совпадение лежит в окне [@ - 64, @ + длина домена].
+    Окно строится от текущей '@'. Если нашлось совпадение с другой (более поздней) '@',
+    его конец могло обрезать окно - поиск повторяется с окном от '@' этого совпадения.
+    """
+    last_end = 0
+    at = text.find('@')
+    while at != -1:
+        match = pattern.search(text, max(last_end, at - EMAIL_MAX_LOCAL), at + EMAIL_MAX_TAIL + 1)
+        if match is None:
+            at = text.find('@', at + 1)
+            continue
+        match_at = text.find('@', match.start())
+        if match_at != at:
+            at = match_at
+            continue
+        yield match
+        last_end = match.end()
+        at = text.find('@', last_end)
+
+# Улучшенный поиск телефонов - более строгие паттерны
+PHONE_PATTERNS = (
+    r'\+\d{1,3}\s?\(?\d{3}\)?\s?\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # +X (XXX) XXX-XX-XX
+    r'\(?\d{3}\)?\s?\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # (XXX) XXX-XX-XX
+    r'\+\d{1,3}\s?\d{3}[-\s]?\d{3}[-\s]?\d{4}',  # +X XXX-XXX-XXXX
+    r'\d{3}[-\s]?\d{3}[-\s]?\d{4}',  # XXX-XXX-XXXX
+    r'\+\d{10,15}',  # + с 10-15 цифрами (российские номера)
+)
+# Каждый телефонный паттерн отдельным проходом: совпадения разных паттернов перекрываются
+# (+49301234567890 - и "+X (XXX) XXX-XX-XX", и "+ с 10-15 цифрами"), а объединенная
+# регулярка вернула бы только первое из них
+PHONE_RES = tuple(re.compile(p) for p in PHONE_PATTERNS)
+# Оформление номера: пробелы убираются через split, остальное - таблицей translate
+PHONE_FORMAT_TABLE = str.maketrans('', '', '-()')
+
+# Социальные сети: именованная группа с username для каждой сети
+SOCIAL_PATTERNS = {
+    'instagram': r'instagram\.com/(?P<instagram>[a-zA-Z0-9_.]+)(?:[/?#]|$)',
+    'facebook': r'(?:facebook\.com|fb\.com)/(?P<facebook>[a-zA-Z0-9_.]+)(?:[/?#]|$)',
+    'linkedin': r'linkedin\.com/(?:in|company)/(?P<linkedin>[a-zA-Z0-9_\-]+)(?:[/?#]|$)',
+    'twitter': r'(?:twitter\.com|x\.com)/(?P<twitter>[a-zA-Z0-9_.]+)(?:[/?#]|$)',
+    'youtube': r'youtube\.com/(?:channel/|c/|user/|@)(?P<youtube>[a-zA-Z0-9_\-]+)(?:[/?#]|$)',
+    'tiktok': r'tiktok\.com/@(?P<tiktok>[a-zA-Z0-9_.]+)(?:[/?#]|$)'
+}
+
+# Соцсети одним проходом по тексту вместо отдельного прохода на каждую сеть;
+# сработавшую сеть определяет match.lastgroup. Текст подается уже в нижнем
+# регистре, поэтому без IGNORECASE - литералы доменов сравниваются напрямую
+SOCIAL_RE = re.compile('|'.join(SOCIAL_PATTERNS.values()))
+
+ADDRESS_RES = tuple(re.compile(p) for p in (
+    r'\d{5}\s+[A-Za-zÀ-ÿ\u0080-\uFFFF][^,]{2,40},\s*[A-Za-zÀ-ÿ\u0080-\uFFFF]+',  # Индекс Город, Страна
+    r'\d+\s+[A-Za-zÀ-ÿ\u0080-\uFFFF][^,]{2,50},\s+\d{5}',  # Улица, индекс
+))
+
+ADDRESS_EXCLUDE_WORDS = ['files', 'attached', 'format', 'doc', 'pdf', 'mb', 'click', 'button', 'submit', 'cookie', 'policy', 'privacy', 'development', 'center', 'representative', 'office']
+# Все стоп-слова одним проходом без учета регистра - без lower()-копии адреса на каждое слово
+ADDRESS_EXCLUDE_RE = re.compile('|'.join(map(re.escape, ADDRESS_EXCLUDE_WORDS)), re.IGNORECASE)
+
+# Мессенджеры: у каждой альтернативы своя именованная группа <семейство>_<n> с контактом,
+# сработавшую альтернативу определяет match.lastgroup. Каждая альтернатива начинается
+# с литерала (в (?:...) - с общего для всех вариантов первого символа)
+MESSENGER_PATTERNS = {
+    'telegram': (
+        r'(?:telegram\.me/|t\.me/)(?P<telegram_1>[\w\.]{3,32})(?:[/?]|$)',
+        r'@(?P<telegram_2>[a-zA-Z_][\w\.]{2,31})(?=\s|$|[.,!?])',  # @username с границами слова, начинается с буквы
+    ),
+    'whatsapp': (
+        r'wa\.me/(?P<whatsapp_1>[\+\d]{7,15})',
+        r'whatsapp\.com/(?P<whatsapp_2>[\+\d]{7,15})',
+        r'(?:whatsapp|wa)\s*[:\+]\s*(?P<whatsapp_3>[\+\d]{7,15})',  # whatsapp: +1234567890
+    ),
+    'viber': (
+        r'viber\.com/(?P<viber_1>[\+\d]{7,15})',
+        r'viber\s*[:\+]\s*(?P<viber_2>[\+\d]{7,15})',
+    ),
+    'signal': (
+        r'signal\.me/\+(?P<signal_1>[\d]{7,15})',
+        r'signal\s*[:\+]\s*(?P<signal_2>[\+\d]{7,15})',
+    ),
+    'skype': (
+        r'skype:(?P<skype_1>[a-zA-Z][\w\.,\-]{1,50})',
+        r'skype\.com/(?P<skype_2>[a-zA-Z][\w\.,\-]{1,50})',
+        r'(?:skype|skype:)\s*(?P<skype_3>[a-zA-Z][\w\.,\-]{1,50})',
+    ),
+    'discord': (
+        r'discord\.gg/(?P<discord_1>[\w\-]{2,20})',
+        r'discord\.com/users/(?P<discord_2>\d{17,19})',
+        r'discord\.com/invite/(?P<discord_3>[\w\-]{2,20})',
+    ),
+}
+
+def _compile_messenger_res(*families):
+    """Альтернативы группируются по первому символу - одна регулярка на группу.
+
+    Регулярка вида 'w(?<=(?=alt1|alt2).)' начинается с литерала, поэтому re быстро пропускает
+    текст без этого символа. Поглощается только первый символ, а сами альтернативы проверяются
+    из lookahead с позиции этого символа: контакт не "съедает" начало соседнего контакта
+    (как при отдельных проходах по каждому паттерну).
+    Без IGNORECASE: мессенджеры ищутся в тексте, приведенном к нижнему регистру"""
+    groups = {}
+    for family in families:
+        for pattern in MESSENGER_PATTERNS[family]:
+            lead = pattern[3] if pattern.startswith('(?:') else pattern[0]
+            groups.setdefault(lead, []).append(pattern)
+    return tuple(
+        re.compile(re.escape(lead) + '(?<=(?=' + '|'.join(patterns) + ').)')
+        for lead, patterns in groups.items()
+    )
+
+MESSENGER_RES = _compile_messenger_res(*MESSENGER_PATTERNS)
+# Быстрый парсер ищет только Telegram, WhatsApp и Viber
+FAST_MESSENGER_RES = _compile_messenger_res('telegram', 'whatsapp', 'viber')
+
+def _parse_regex(tree, source_url, found_contacts):
+    text = _page_text(tree)
+
+    # Улучшенный поиск email с валидацией. iter_emails проверяет регуляркой только окна вокруг '@'
+    hits = 0
+    for email in iter_emails(EMAIL_RE, text):
         email_clean = email.group(0).strip()
         # Используем функцию валидации
         if is_valid_email(email_clean):
-            found_contacts.add(('email', email_clean.lower(), source_url))
-
-    # Улучшенный поиск телефонов - более строгие паттерны
-    phone_patterns = [
-        r'\+\d{1,3}\s?\(?\d{3}\)?\s?\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # +X (XXX) XXX-XX-XX
-        r'\(?\d{3}\)?\s?\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # (XXX) XXX-XX-XX
-        r'\+\d{1,3}\s?\d{3}[-\s]?\d{3}[-\s]?\d{4}',  # +X XXX-XXX-XXXX
-        r'\d{3}[-\s]?\d{3}[-\s]?\d{4}',  # XXX-XXX-XXXX
-        r'\+\d{10,15}',  # + с 10-15 цифрами (российские номера)
-    ]
-    
+            found_contacts.add('email', email_clean.lower(), source_url)
+            hits += 1
+            if hits >= MAX_PATTERN_HITS:
+                break
+
+    # Поиск телефонов
     found_phones = set()  # Для избежания дубликатов
-    for pattern in phone_patterns:
-        for phone_match in re.finditer(pattern, text):
-            phone = phone_match.group(0).strip()
+    for pattern in PHONE_RES:
+        hits = 0
+        for match in pattern.finditer(text):
+            phone = match.group(0).strip()
             # Проверяем что это валидный номер телефона
             if is_valid_phone(phone):
                 # Очищаем от лишних символов
-                phone_clean = re.sub(r'[\s\-\(\)]', '', phone)
+                phone_clean = ''.join(phone.split()).translate(PHONE_FORMAT_TABLE)
                 if phone_clean not in found_phones:
                     found_phones.add(phone_clean)
-                    found_contacts.add(('phone', phone_clean, source_url))
-
-    # Поиск социальных сетей
-    social_patterns = {
-        'instagram': r'instagram\.com/([a-zA-Z0-9_.]+)(?:[/?#]|$)',
-        'facebook': r'(?:facebook\.com|fb\.com)/([a-zA-Z0-9_.]+)(?:[/?#]|$)',
-        'linkedin': r'linkedin\.com/(?:in|company)/([a-zA-Z0-9_\-]+)(?:[/?#]|$)',
-        'twitter': r'(?:twitter\.com|x\.com)/([a-zA-Z0-9_.]+)(?:[/?#]|$)',
-        'youtube': r'youtube\.com/(?:channel/|c/|user/|@)([a-zA-Z0-9_\-]+)(?:[/?#]|$)',
-        'tiktok': r'tiktok\.com/@([a-zA-Z0-9_.]+)(?:[/?#]|$)'
-    }
-    
-    for social_type, pattern in social_patterns.items():
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            social_handle = match.group(1)
-            if 'http' not in social_handle and 'www' not in social_handle and len(social_handle) < 50:
-                found_contacts.add(('social', f'{social_type}: {social_handle.lower()}', source_url))
-    
+                    found_contacts.add('phone', phone_clean, source_url)
+                    hits += 1
+                    if hits >= MAX_PATTERN_HITS:
+                        break
+
+    # Соцсети и мессенджеры ищутся в тексте в нижнем регистре (один lower() на страницу)
+    text_lc = text.lower()
+
+    # Поиск социальных сетей; предел - на каждую сеть. Проход общий для всех сетей, поэтому
+    # совпадения исчерпанной сети пропускаются, а проход прекращается, когда исчерпаны все
+    social_hits = dict.fromkeys(SOCIAL_PATTERNS, 0)
+    for match in _iter_open_families(SOCIAL_RE, text_lc, social_hits):
+        kind = match.lastgroup
+        if social_hits[kind] >= MAX_PATTERN_HITS:
+            continue
+        social_handle = match.group(kind)
+        if 'http' not in social_handle and 'www' not in social_handle and len(social_handle) < 50:
+            found_contacts.add('social', f'{kind}: {social_handle.lower()}', source_url)
+            social_hits[kind] += 1
+    
+    # Адреса и мессенджеры (все семейства)
+    _scan_text_for_contacts(text, text_lc, source_url, found_contacts)
+
+def _scan_text_for_contacts(text, text_lc, source_url, found_contacts,
+                            messenger_res=MESSENGER_RES, address_len=(10, 100)):
+    """Поиск адресов и мессенджеров в тексте страницы - общий для обоих парсеров.
+    text_lc - тот же текст в нижнем регистре, в нем ищутся мессенджеры"""
+    min_len, max_len = address_len
     # Поиск адресов
-    address_patterns = [
-        r'\d{5}\s+[A-Za-zÀ-ÿ\u0080-\uFFFF][^,]{2,40},\s*[A-Za-zÀ-ÿ\u0080-\uFFFF]+',  # Индекс Город, Страна
-        r'\d+\s+[A-Za-zÀ-ÿ\u0080-\uFFFF][^,]{2,50},\s+\d{5}',  # Улица, индекс
-    ]
-    
-    address_exclude_words = ['files', 'attached', 'format', 'doc', 'pdf', 'mb', 'click', 'button', 'submit', 'cookie', 'policy', 'privacy', 'development', 'center', 'representative', 'office']
-    
-    for pattern in address_patterns:
-        for match in re.finditer(pattern, text):
+    for pattern in ADDRESS_RES:
+        hits = 0
+        for match in pattern.finditer(text):
             address = match.group(0).strip()
             # Проверяем что это похоже на адрес
-            if 10 <= len(address) <= 100:
-                if not any(word in address.lower() for word in address_exclude_words):
-                    found_contacts.add(('address', address, source_url))
-
-    # Поиск мессенджеров
-    # Telegram
-    telegram_patterns = [
-        r'(?:telegram\.me/|t\.me/)([\w\.]{3,32})(?:[/?]|$)',
-        r'@([a-zA-Z_][\w\.]{2,31})(?=\s|$|[.,!?])'  # @username с границами слова, начинается с буквы
-    ]
-    for pattern in telegram_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            handle = match.group(1)
-            if len(handle) >= 3 and '.' not in handle:  # Исключаем домены
-                found_contacts.add(('messenger', f'telegram: {handle.lower()}', source_url))  # Нормализуем
-    
-    # WhatsApp
-    whatsapp_patterns = [
-        r'wa\.me/([\+\d]{7,15})',
-        r'whatsapp\.com/([\+\d]{7,15})',
-        r'(?:whatsapp|wa)\s*[:\+]\s*([\+\d]{7,15})',  # whatsapp: +1234567890
-    ]
-    for pattern in whatsapp_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            number = match.group(1)
-            if len(re.sub(r'\D', '', number)) >= 7:
-                clean_number = re.sub(r'[^\d]', '', number)
-                found_contacts.add(('messenger', f'whatsapp: +{clean_number}', source_url))  # Нормализуем
-    
-    # Viber
-    viber_patterns = [
-        r'viber\.com/([\+\d]{7,15})',
-        r'viber\s*[:\+]\s*([\+\d]{7,15})',
-    ]
-    for pattern in viber_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            number = match.group(1)
-            if len(re.sub(r'\D', '', number)) >= 7:
-                clean_number = re.sub(r'[^\d]', '', number)
-                found_contacts.add(('messenger', f'viber: +{clean_number}', source_url))  # Нормализуем
-
-    # Signal
-    signal_patterns = [
-        r'signal\.me/\+([\d]{7,15})',
-        r'signal\s*[:\+]\s*([\+\d]{7,15})'
-    ]
-    for pattern in signal_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            number = match.group(1)
-            clean_number = re.sub(r'[^\d]', '', number)
+            if min_len <= len(address) <= max_len:
+                if not ADDRESS_EXCLUDE_RE.search(address):
+                    found_contacts.add('address', address, source_url)
+                    hits += 1
+                    if hits >= MAX_PATTERN_HITS:
+                        break
+
+    # Регистр важен только для Discord - его значение берется из исходного текста по смещениям,
+    # если lower() не изменил длину текста (так почти всегда)
+    same_offsets = len(text_lc) == len(text)
+
+    # Поиск мессенджеров: проход на каждую группу messenger_res, совпадения групп сливаются
+    # по мере поиска в порядке появления в тексте. Предел - на каждое семейство: проход группы
+    # прекращается, когда исчерпаны все ее семейства, а цикл - когда исчерпаны все группы
+    messenger_hits = defaultdict(int)
+    matches = heapq.merge(
+        *(_iter_open_families(pattern, text_lc, messenger_hits) for pattern in messenger_res),
+        key=lambda match: match.start()
+    )
+    for match in matches:
+        kind = match.lastgroup
+        family = kind.rsplit('_', 1)[0]
+        if messenger_hits[family] >= MAX_PATTERN_HITS:
+            continue
+        value = match.group(kind)
+        contact = None
+        if family == 'telegram':
+            if len(value) >= 3 and '.' not in value:  # Исключаем домены
+                contact = f'telegram: {value.lower()}'  # Нормализуем
+        elif family == 'skype':
+            if len(value) >= 3:
+                contact = f'skype: {value.lower()}'
+        elif family == 'discord':
+            if same_offsets:
+                value = text[match.start(kind):match.end(kind)]
+            contact = f'discord: {value}'
+        else:
+            # WhatsApp, Viber, Signal - номер телефона; в захвате только цифры и '+'
+            clean_number = value.replace('+', '')
             if len(clean_number) >= 7:
-                found_contacts.add(('messenger', f'signal: +{clean_number}', source_url))
-
-    # Skype
-    skype_patterns = [
-        r'skype:([a-zA-Z][\w\.,\-]{1,50})',
-        r'skype\.com/([a-zA-Z][\w\.,\-]{1,50})',
-        r'(?:skype|skype:)\s*([a-zA-Z][\w\.,\-]{1,50})'
-    ]
-    for pattern in skype_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            handle = match.group(1)
-            if len(handle) >= 3:
-                found_contacts.add(('messenger', f'skype: {handle.lower()}', source_url))
-
-    # Discord
-    discord_patterns = [
-        r'discord\.gg/([\w\-]{2,20})',
-        r'discord\.com/users/(\d{17,19})',
-        r'discord\.com/invite/([\w\-]{2,20})'
-    ]
-    for pattern in discord_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            invite_or_id = match.group(1)
-            found_contacts.add(('messenger', f'discord: {invite_or_id}', source_url))
-
-def parse_page_for_contacts(soup, url, found_contacts):
-    _parse_json_ld(soup, url, found_contacts)
-    _parse_links(soup, url, found_contacts)
-    _parse_regex(soup, url, found_contacts)
+                contact = f'{family}: +{clean_number}'  # Нормализуем
+        if contact is not None:
+            found_contacts.add('messenger', contact, source_url)
+            messenger_hits[family] += 1
+
+# Структурированные источники (JSON-LD, mailto:/tel:) точнее регулярок по тексту. Если они
+# в этом проходе по странице дали и email, и телефон, проход регулярками пропускается.
+# Контакты из других проходов (быстрый парсер по исходному HTML) не учитываются: DOM после
+# рендеринга Playwright может содержать то, чего в исходном HTML не было.
+# CONTACTS_FULL_SCAN=1 включает полный поиск всегда
+CONTACTS_FULL_SCAN = os.environ.get('CONTACTS_FULL_SCAN', '').lower() in ('1', 'true', 'yes')
+SUFFICIENT_CONTACT_TYPES = frozenset(('email', 'phone'))
+
+def parse_page_for_contacts(tree, url, found_contacts, full_scan=CONTACTS_FULL_SCAN):
+    structured = ContactList()
+    _parse_json_ld(tree, url, structured)
+    _parse_links(tree, url, structured)
+    for contact in structured:
+        found_contacts.add(*contact)
+    if full_scan or not SUFFICIENT_CONTACT_TYPES <= {contact[0] for contact in structured}:
+        _parse_regex(tree, url, found_contacts)
+
+# Паттерны быстрого парсера (selectolax); телефоны, адреса и мессенджеры - общие с _parse_regex
+FAST_EMAIL_RE = re.compile(r'(?<![.\d])[A-Za-z0-9._%+\-]{1,64}@[A-Za-z0-9.\-]{1,255}\.[A-Za-z]{2,24}(?![.\d])')
+FAST_FAKE_EMAIL_DOMAINS = ('example.com', 'test.com', 'domain.com', 'email.com', 'yourdomain.com')
+FAST_FAKE_EMAIL_RE = re.compile('|'.join(map(re.escape, FAST_FAKE_EMAIL_DOMAINS)), re.IGNORECASE)
+SOCIAL_URL_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'https?://(?:www\.)?instagram\.com/[^\s<>"\'()]+',
+    r'https?://(?:www\.)?facebook\.com/[^\s<>"\'()]+',
+    r'https?://(?:www\.)?linkedin\.com/[^\s<>"\'()]+',
+    r'https?://(?:www\.)?twitter\.com/[^\s<>"\'()]+',
+    r'https?://(?:www\.)?x\.com/[^\s<>"\'()]+',
+    r'https?://(?:www\.)?youtube\.com/[^\s<>"\'()]+',
+    r'https?://(?:www\.)?tiktok\.com/[^\s<>"\'()]+',
+))
+
+def _find_contacts_in_json(root, source_url, found_contacts):
+    """Ищет email и telephone по всему дереву JSON-LD обходом со стеком вместо рекурсии"""
+    # В стеке пары (ключ, значение); элементы списков - с ключом None.
+    # Кладем в обратном порядке, чтобы снимать в том же порядке, что и при рекурсии
+    stack = [(None, root)]
+    while stack:
+        key, obj = stack.pop()
+        if type(obj) is dict:
+            stack.extend(reversed(obj.items()))
+        elif type(obj) is list:
+            stack.extend((None, item) for item in reversed(obj))
+        elif type(obj) is str:
+            if key == 'email':
+                found_contacts.add('email', obj.lower(), source_url)
+            elif key == 'telephone':
+                found_contacts.add('phone', obj, source_url)
 
 def _parse_page_with_selectolax(html_content, url, found_contacts):
-    """Быстрый парсинг с использованием selectolax"""
+    """Быстрый парсинг с использованием selectolax. Возвращает дерево страницы
+    (для повторного использования) или None при ошибке"""
     if not FAST_PARSER_AVAILABLE:
-        return False
+        return None
     
     try:
         tree = HTMLParser(html_content)
         
         # Парсим JSON-LD
         for script in tree.css('script[type="application/ld+json"]'):
+            raw = script.text(deep=False).strip()
+            if len(raw) < 3:
+                continue
             try:
-                data = json.loads(script.text())
-                def find_contacts_in_json(obj):
-                    if isinstance(obj, dict):
-                        for key, value in obj.items():
-                            if key == 'email':
-                                found_contacts.add(('email', value.lower(), url))
-                            elif key == 'telephone':
-                                found_contacts.add(('phone', value, url))
-                            elif key == 'contactPoint':
-                                find_contacts_in_json(value)
-                            else:
-                                find_contacts_in_json(value)
-                    elif isinstance(obj, list):
-                        for item in obj:
-                            find_contacts_in_json(item)
-                find_contacts_in_json(data)
+                _find_contacts_in_json(json_loads(raw), url, found_contacts)
             except (json.JSONDecodeError, AttributeError):
                 continue
         
         # Парсим ссылки
         for a in tree.css('a[href]'):
             href = a.attributes.get('href', '').strip()
-            if href.startswith('mailto:'):
-                email = href.replace('mailto:', '').strip()
+            # Схема без учета регистра: встречаются MAILTO: и Tel:
+            scheme = _href_scheme(href)
+            if scheme == 'mailto':
+                email = href[len('mailto:'):].strip()
                 if email and '@' in email:
-                    found_contacts.add(('email', email.lower(), url))
-            elif href.startswith('tel:'):
-                phone = href.replace('tel:', '').strip()
+                    found_contacts.add('email', email.lower(), url)
+                continue
+            if scheme == 'tel':
+                phone = href[len('tel:'):].strip()
                 if phone and len(phone) >= 7:
-                    found_contacts.add(('phone', phone, url))
+                    found_contacts.add('phone', phone, url)
+                continue
+            
+            # Тип ссылки - по хосту, одним поиском в словаре
+            contact_type = _link_contact_type(href)
             # Поиск социальных сетей в href - сохраняем полную ссылку
-            elif any(social in href.lower() for social in ['instagram.com', 'facebook.com', 'linkedin.com', 'twitter.com', 'x.com', 'youtube.com', 'tiktok.com']):
+            if contact_type == 'social':
                 # Нормализуем URL - добавляем https если нет
                 full_url = href
                 if not full_url.startswith('http'):
@@ -950,178 +1356,93 @@ def _parse_page_with_selectolax(html_content, url, found_contacts):
                         full_url = 'https:' + full_url
                     else:
                         full_url = 'https://' + full_url
-                found_contacts.add(('social', full_url, url))
+                found_contacts.add('social', full_url, url)
             # Поиск мессенджеров в href - сохраняем полную ссылку
-            elif any(messenger in href.lower() for messenger in ['telegram.me', 't.me', 'whatsapp.com', 'wa.me', 'viber.com']):
+            elif contact_type == 'messenger':
                 # Нормализуем URL
                 full_url = href
                 if not full_url.startswith('http') and not full_url.startswith('//'):
                     full_url = 'https://' + full_url
-                found_contacts.add(('messenger', full_url, url))
+                found_contacts.add('messenger', full_url, url)
         
         # Парсим текст с улучшенными паттернами
-        text = tree.body.text() if tree.body else ''
+        text = _page_text(tree)
         
         # Улучшенный поиск email - более строгий паттерн
-        email_pattern = r'(?<![.\d])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}(?![.\d])'
-        for email in re.finditer(email_pattern, text):
+        hits = 0
+        for email in iter_emails(FAST_EMAIL_RE, text):
             email_clean = email.group(0).strip()
             # Фильтруем ложные срабатывания
-            if not any(x in email_clean.lower() for x in ['example.com', 'test.com', 'domain.com', 'email.com', 'yourdomain.com']):
+            if not FAST_FAKE_EMAIL_RE.search(email_clean):
                 # Проверяем что email не начинается с цифры
                 if not email_clean[0].isdigit():
-                    found_contacts.add(('email', email_clean.lower(), url))
+                    found_contacts.add('email', email_clean.lower(), url)
+                    hits += 1
+                    if hits >= MAX_PATTERN_HITS:
+                        break
         
         # Улучшенный поиск телефонов - более строгие паттерны
-        phone_patterns = [
-            r'\+\d{1,3}\s?\(?\d{3}\)?\s?\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # +X (XXX) XXX-XX-XX
-            r'\(?\d{3}\)?\s?\d{3}[-\s]?\d{2}[-\s]?\d{2}',  # (XXX) XXX-XX-XX
-            r'\+\d{1,3}\s?\d{3}[-\s]?\d{3}[-\s]?\d{4}',  # +X XXX-XXX-XXXX
-            r'\d{3}[-\s]?\d{3}[-\s]?\d{4}',  # XXX-XXX-XXXX
-            r'\+\d{10,15}',  # + с 10-15 цифрами
-        ]
-        
         found_phones = set()  # Для избежания дубликатов
-        for pattern in phone_patterns:
-            for phone_match in re.finditer(pattern, text):
+        for pattern in PHONE_RES:
+            hits = 0
+            for phone_match in pattern.finditer(text):
                 phone = phone_match.group(0).strip()
                 # Проверяем что это валидный номер телефона
                 if is_valid_phone(phone):
                     # Очищаем от лишних символов
-                    phone_clean = re.sub(r'[\s\-\(\)]', '', phone)
+                    phone_clean = ''.join(phone.split()).translate(PHONE_FORMAT_TABLE)
                     if phone_clean not in found_phones:
                         found_phones.add(phone_clean)
-                        found_contacts.add(('phone', phone_clean, url))
+                        found_contacts.add('phone', phone_clean, url)
+                        hits += 1
+                        if hits >= MAX_PATTERN_HITS:
+                            break
 
         # Поиск социальных сетей - ищем полные URL в тексте
-        social_url_patterns = [
-            r'https?://(?:www\.)?instagram\.com/[^\s<>"\'()]+',
-            r'https?://(?:www\.)?facebook\.com/[^\s<>"\'()]+',
-            r'https?://(?:www\.)?linkedin\.com/[^\s<>"\'()]+',
-            r'https?://(?:www\.)?twitter\.com/[^\s<>"\'()]+',
-            r'https?://(?:www\.)?x\.com/[^\s<>"\'()]+',
-            r'https?://(?:www\.)?youtube\.com/[^\s<>"\'()]+',
-            r'https?://(?:www\.)?tiktok\.com/[^\s<>"\'()]+',
-        ]
-        
-        for pattern in social_url_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
+        for pattern in SOCIAL_URL_RES:
+            hits = 0
+            for match in pattern.finditer(text):
                 full_url = match.group(0).strip()
                 if len(full_url) > 10 and len(full_url) < 100:
-                    found_contacts.add(('social', full_url, url))
-
-        # Поиск адресов
-        address_patterns = [
-            r'\d{5}\s+[A-Za-zÀ-ÿ\u0080-\uFFFF][^,]{2,40},\s*[A-Za-zÀ-ÿ\u0080-\uFFFF]+',
-            r'\d+\s+[A-Za-zÀ-ÿ\u0080-\uFFFF][^,]{2,50},\s+\d{5}',
-        ]
-        
-        address_exclude_words = ['files', 'attached', 'format', 'doc', 'pdf', 'mb', 'click', 'button', 'submit', 'cookie', 'policy', 'privacy', 'development', 'center', 'representative', 'office']
-        
-        for pattern in address_patterns:
-            for match in re.finditer(pattern, text):
-                address = match.group(0).strip()
-                if 15 <= len(address) <= 150:
-                    if not any(word in address.lower() for word in address_exclude_words):
-                        found_contacts.add(('address', address, url))
-
-        # Поиск мессенджеров
-        # Telegram
-        telegram_patterns = [
-            r'(?:telegram\.me/|t\.me/)([\w\.]{3,32})(?:[/?]|$)',
-            r'@([a-zA-Z_][\w\.]{2,31})(?=\s|$|[.,!?])'  # @username с границами слова, начинается с буквы
-        ]
-        for pattern in telegram_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                handle = match.group(1)
-                if len(handle) >= 3 and '.' not in handle:  # Исключаем домены
-                    found_contacts.add(('messenger', f'telegram: {handle}', url))
+                    found_contacts.add('social', full_url, url)
+                    hits += 1
+                    if hits >= MAX_PATTERN_HITS:
+                        break
+
+        # Адреса (допускаются длиннее) и мессенджеры (Telegram, WhatsApp, Viber)
+        _scan_text_for_contacts(text, text.lower(), url, found_contacts,
+                                messenger_res=FAST_MESSENGER_RES, address_len=(15, 150))
         
-        # WhatsApp
-        whatsapp_patterns = [
-            r'wa\.me/([\+\d]{7,15})',
-            r'whatsapp\.com/([\+\d]{7,15})',
-            r'(?:whatsapp|wa)\s*[:\+]\s*([\+\d]{7,15})',  # whatsapp: +1234567890
-        ]
-        for pattern in whatsapp_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                number = match.group(1)
-                if len(re.sub(r'\D', '', number)) >= 7:
-                    found_contacts.add(('messenger', f'whatsapp: +{re.sub(r"[^\d]", "", number)}', url))
-        
-        # Viber
-        viber_patterns = [
-            r'viber\.com/([\+\d]{7,15})',
-            r'viber\s*[:\+]\s*([\+\d]{7,15})',
-        ]
-        for pattern in viber_patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                number = match.group(1)
-                if len(re.sub(r'\D', '', number)) >= 7:
-                    found_contacts.add(('messenger', f'viber: +{re.sub(r"[^\d]", "", number)}', url))
-        
-        return True
+        return tree
         
     except Exception as e:
         print(f"Error in selectolax parsing: {e}")
-        return False
+        return None
 
-def _extract_navigation_links_selectolax(html_content, base_url):
-    """Извлекает навигационные ссылки с помощью selectolax"""
-    if not FAST_PARSER_AVAILABLE:
-        return set()
-    
+# Навигационные области - одной группой селекторов: один обход дерева вместо обхода на каждый
+NAV_LINK_SELECTOR = ', '.join((
+    'nav a', 'header a', '.navigation a', '.nav a', '.menu a',
+    '.header a', '.top-nav a', '.main-nav a', '.footer a', 'footer a',
+    '.site-footer a', '.bottom-nav a', '.sidebar a', '.widget a'
+))
+
+def _extract_navigation_links_selectolax(tree, base_url):
+    """Извлекает ссылки из шапки, навигации и футера уже разобранной страницы"""
     navigation_links = set()
     
     try:
-        tree = HTMLParser(html_content)
-        
-        # Селекторы для навигационных областей
-        nav_selectors = [
-            'nav a', 'header a', '.navigation a', '.nav a', '.menu a',
-            '.header a', '.top-nav a', '.main-nav a', '.footer a', 'footer a',
-            '.site-footer a', '.bottom-nav a', '.sidebar a', '.widget a'
-        ]
-        
-        for selector in nav_selectors:
-            try:
-                links = tree.css(selector)
-                for link in links:
-                    href = link.attributes.get('href', '')
-                    if href and not href.startswith('#'):
-                        full_url = urljoin(base_url, href)
-                        navigation_links.add(full_url)
-            except:
-                continue
+        for link in tree.css(NAV_LINK_SELECTOR):
+            href = link.attributes.get('href', '')
+            if href and not href.startswith('#'):
+                full_url = urljoin(base_url, href)
+                navigation_links.add(full_url)
     except Exception as e:
         print(f"Error extracting navigation links with selectolax: {e}")
     
     return navigation_links
 
-def _extract_navigation_links(soup, base_url):
-    """Извлекает ссылки из шапки, навигации и футера"""
-    navigation_links = set()
-    
-    # Селекторы для навигационных областей
-    nav_selectors = [
-        'nav a', 'header a', '.navigation a', '.nav a', '.menu a',
-        '.header a', '.top-nav a', '.main-nav a', '.footer a', 'footer a',
-        '.site-footer a', '.bottom-nav a', '.sidebar a', '.widget a'
-    ]
-    
-    for selector in nav_selectors:
-        try:
-            links = soup.select(selector)
-            for link in links:
-                href = link.get('href')
-                if href and not href.startswith('#'):
-                    full_url = urljoin(base_url, href)
-                    navigation_links.add(full_url)
-        except:
-            continue
-    
-    return navigation_links
-
+# Навигация одинакова на всех страницах сайта - оценки одних и тех же ссылок кэшируются
+@lru_cache(maxsize=8192)
 def calculate_url_depth_score(url: str) -> float:
     """Оценивает приоритет по глубине URL"""
     # Убираем домен, считаем только путь
@@ -1135,48 +1456,39 @@ def calculate_url_depth_score(url: str) -> float:
     else:               # /company/about/contact
         return 0.4
 
-def _is_potential_contact_page(url, link_text=""):
-    """Проверяет, может ли страница содержать контактную информацию. Возвращает вес (0.0 - 1.0)."""
-    # Мультиязычные ключевые слова
-    HIGH_PRIORITY = [
+# Мультиязычные ключевые слова контактных страниц по убыванию приоритета
+CONTACT_PAGE_KEYWORDS = (
+    (1.0, (
         'contact', 'контакт', 'support', 'поддержка', 'feedback', 'связаться',
         'contacto', 'contato', 'kontakt', 'contattaci', 'contactez',
         'связь', 'контакты', 'обратная связь'
-    ]
-    MEDIUM_PRIORITY = [
+    )),
+    (0.6, (
         'about', 'о', 'team', 'команда', 'company', 'компания', 'staff', 'персонал',
         'impressum', 'legal', 'address'
-    ]
-    LOW_PRIORITY = [
+    )),
+    (0.2, (
         'blog', 'news', 'новости', 'portfolio', 'портфолио', 'gallery', 'галерея'
-    ]
-    
-    url_lower = url.lower()
-    text_lower = link_text.lower()
-    combined = url_lower + ' ' + text_lower
+    )),
+)
+# Каждый уровень - одна регулярка без учета регистра вместо цикла по словам
+CONTACT_PAGE_KEYWORD_RES = tuple(
+    (score, re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE))
+    for score, keywords in CONTACT_PAGE_KEYWORDS
+)
+
+@lru_cache(maxsize=8192)
+def _is_potential_contact_page(url, link_text=""):
+    """Проверяет, может ли страница содержать контактную информацию. Возвращает вес (0.0 - 1.0)."""
+    combined = url + ' ' + link_text
     
+    # Вес - по самому приоритетному уровню, слово которого нашлось
     base_score = 0.0
-    
-    # Высокий приоритет
-    for keyword in HIGH_PRIORITY:
-        if keyword in combined:
-            base_score = 1.0
+    for score, keywords_re in CONTACT_PAGE_KEYWORD_RES:
+        if keywords_re.search(combined):
+            base_score = score
             break
     
-    if base_score == 0:
-        # Средний приоритет
-        for keyword in MEDIUM_PRIORITY:
-            if keyword in combined:
-                base_score = 0.6
-                break
-    
-    if base_score == 0:
-        # Низкий приоритет
-        for keyword in LOW_PRIORITY:
-            if keyword in combined:
-                base_score = 0.2
-                break
-    
     # Учитываем глубину URL
     depth_score = calculate_url_depth_score(url)
     
@@ -1198,6 +1510,105 @@ def _filter_contact_links(links):
     scored_links.sort(key=lambda x: x[0], reverse=True)
     return [link for _, link in scored_links[:10]]
 
+# Playwright: один Chromium на процесс, живет в общем фоновом цикле.
+# На каждый запрос - свой BrowserContext, страницы грузятся параллельно
+MAX_PARALLEL_PAGES = 3
+_playwright = None
+_browser = None
+_browser_lock = None
+
+async def _get_browser():
+    """Запускает браузер при первом обращении и переиспользует его между запросами"""
+    global _playwright, _browser, _browser_lock
+    if _browser_lock is None:
+        _browser_lock = asyncio.Lock()
+    async with _browser_lock:
+        # Упавший или закрытый браузер перезапускаем, а не отдаем мертвый
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch(headless=True)
+    return _browser
+
+async def _close_browser():
+    """Закрывает общий браузер и Playwright при остановке приложения"""
+    global _playwright, _browser
+    try:
+        if _browser is not None:
+            await _browser.close()
+        if _playwright is not None:
+            await _playwright.stop()
+    except Exception as e:
+        print(f"Ошибка закрытия Playwright: {e}")
+    finally:
+        _browser = _playwright = None
+
+atexit.register(_run_async_at_exit, _close_browser)
+
+async def _render_pages(urls, timeout=20000, settle_ms=1500):
+    """Рендерит страницы в общем браузере; возвращает [(url, html или None)] в исходном порядке"""
+    browser = await _get_browser()
+    context = await browser.new_context()
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_PAGES)
+
+    async def render(url):
+        async with semaphore:
+            page = await context.new_page()
+            try:
+                print(f"--- Playwright парсинг: {url} ---")
+                await page.goto(url, wait_until='networkidle', timeout=timeout)
+                await page.wait_for_timeout(settle_ms)
+                return url, await page.content()
+            except Exception as e:
+                print(f"Error processing {url}: {e}")
+                return url, None
+            finally:
+                await page.close()
+
+    try:
+        return await asyncio.gather(*(render(url) for url in urls))
+    finally:
+        await context.close()
+
+# Быстрый парсинг: страницы скачиваются параллельно в общем фоновом цикле, каждая разбирается
+# в пуле потоков сразу после загрузки - пока остальные еще качаются
+MAX_PARALLEL_FETCHES = 8
+_parse_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='parse')
+
+class ContactList(list):
+    """Контакты одной страницы в порядке нахождения - потом переносятся в ContactAccumulator"""
+    def add(self, contact_type: str, value: str, source_url: str):
+        self.append((contact_type, value, source_url))
+
+def _parse_page_fast(url, html_content):
+    """Возвращает (контакты страницы, дерево страницы или None)"""
+    contacts = ContactList()
+    tree = _parse_page_with_selectolax(html_content, url, contacts)
+    return contacts, tree
+
+async def _fetch_pages(urls, timeout=10.0, parse=None):
+    """Скачивает страницы параллельно; возвращает [(url, html или None)] в исходном порядке.
+    С parse вместо html - результат parse(url, html), посчитанный в _parse_executor"""
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_FETCHES)
+    loop = asyncio.get_running_loop()
+
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+        async def fetch(url):
+            async with semaphore:
+                try:
+                    print(f"--- Быстрый парсинг: {url} ---")
+                    response = await client.get(url)
+                    if response.status_code != 200:
+                        return url, None
+                except Exception as e:
+                    print(f"Ошибка быстрого парсинга {url}: {e}")
+                    return url, None
+            if parse is None:
+                return url, response.text
+            return url, await loop.run_in_executor(_parse_executor, parse, url, response.text)
+
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
 @app.route('/parse_contacts', methods=['POST'])
 def parse_contacts_endpoint():
     data = request.get_json()
@@ -1225,7 +1636,7 @@ def parse_contacts_endpoint():
             url_to_entity_id[url] = entity_id
             urls.append(url)
 
-    found_contacts = set()
+    found_contacts = ContactAccumulator(url_to_entity_id.get)
     
     # Only process the initial URLs and a few common contact page URLs
     urls_to_process = list(urls)
@@ -1256,179 +1667,102 @@ def parse_contacts_endpoint():
                 '',
                 ''
             ))
+            # Ключи url_to_entity_id - ровно URL из urls_to_process, поэтому он же служит
+            # множеством для проверки дубликатов за O(1) вместо поиска по списку
             if contact_url not in url_to_entity_id:
                 url_to_entity_id[contact_url] = url_to_entity_id.get(url)
-            if contact_url not in urls_to_process:
                 urls_to_process.append(contact_url)
     
-    print(f"URLs to process: {urls_to_process}")
+    # Отладочный вывод форматируется только при включенном DEBUG-логировании
+    app.logger.debug("URLs to process: %s", urls_to_process)
+
+    # Навигация для поиска контактных страниц берется с первой страницы - из ее уже
+    # разобранного дерева, без повторной загрузки и разбора
+    first_url = urls_to_process[0]
 
     # ШАГ 1: Быстрый парсинг с httpx + selectolax
-    print(f"FAST_PARSER_AVAILABLE: {FAST_PARSER_AVAILABLE}")
+    app.logger.debug("FAST_PARSER_AVAILABLE: %s", FAST_PARSER_AVAILABLE)
     if FAST_PARSER_AVAILABLE:
         print("=== ШАГ 1: Быстрый парсинг с httpx + selectolax ===")
         
-        with httpx.Client(timeout=10.0, follow_redirects=True) as client:
-            for url in urls_to_process:
-                try:
-                    print(f"--- Быстрый парсинг: {url} ---")
-                    response = client.get(url)
-                    if response.status_code == 200:
-                        _parse_page_with_selectolax(response.text, url, found_contacts)
-                except Exception as e:
-                    print(f"Ошибка быстрого парсинга {url}: {e}")
-                    continue
+        # Загрузка и разбор параллельные; в общий список контакты переносятся по порядку URL
+        first_tree = None
+        for url, parsed in _run_async(_fetch_pages(urls_to_process, parse=_parse_page_fast)):
+            if parsed is None:
+                continue
+            contacts, tree = parsed
+            if url == first_url:
+                first_tree = tree
+            for contact in contacts:
+                found_contacts.add(*contact)
         
         print(f"После быстрого парсинга найдено контактов: {len(found_contacts)}")
         
         # Если контакты не найдены, ищем в навигационных ссылках
-        if not found_contacts and urls_to_process:
+        if not found_contacts and first_tree is not None:
             print("Контакты не найдены, ищем в навигационных ссылках (быстрый парсинг)...")
             
-            with httpx.Client(timeout=10.0, follow_redirects=True) as client:
-                try:
-                    # Используем первую страницу для извлечения навигации
-                    first_url = urls_to_process[0]
-                    response = client.get(first_url)
-                    if response.status_code == 200:
-                        navigation_links = _extract_navigation_links_selectolax(response.text, first_url)
-                        promising_links = _filter_contact_links(navigation_links)
-                        
-                        for link_url in promising_links:
-                            if link_url not in urls_to_process:
-                                try:
-                                    print(f"--- Быстрый парсинг навигационной ссылки: {link_url} ---")
-                                    response = client.get(link_url)
-                                    if response.status_code == 200:
-                                        _parse_page_with_selectolax(response.text, link_url, found_contacts)
-                                        
-                                        # Выходим раньше, если нашли контакты
-                                        if found_contacts:
-                                            break
-                                            
-                                except Exception as e:
-                                    print(f"Ошибка быстрого парсинга ссылки {link_url}: {e}")
-                                    continue
-                except Exception as e:
-                    print(f"Ошибка при извлечении навигационных ссылок: {e}")
+            try:
+                navigation_links = _extract_navigation_links_selectolax(first_tree, first_url)
+                promising_links = [link_url for link_url in _filter_contact_links(navigation_links)
+                                   if link_url not in url_to_entity_id]
+                
+                # Ссылок не больше 10 - качаем и разбираем все сразу, берем до первых найденных контактов
+                for link_url, parsed in _run_async(_fetch_pages(promising_links, parse=_parse_page_fast)):
+                    if parsed is None:
+                        continue
+                    for contact in parsed[0]:
+                        found_contacts.add(*contact)
+                    
+                    # Выходим раньше, если нашли контакты
+                    if found_contacts:
+                        break
+            except Exception as e:
+                print(f"Ошибка при извлечении навигационных ссылок: {e}")
     
     # ШАГ 2: Всегда используем Playwright для получения динамического контента
     # Это позволяет получить контакты загружаемые через JavaScript
     print("\n=== ШАГ 2: Парсинг с Playwright (для JavaScript контента) ===")
     
-    for url in urls_to_process[:5]:  # Ограничиваем чтобы не было слишком долго
+    try:
+        rendered = _run_async(_render_pages(urls_to_process[:5]))  # Ограничиваем чтобы не было слишком долго
+    except Exception as e:
+        print(f"Ошибка запуска Playwright: {e}")
+        rendered = []
+    first_tree = None
+    for url, content in rendered:
+        if content is None:
+            continue
+        tree = HTMLParser(content)
+        if url == first_url:
+            first_tree = tree
+        parse_page_for_contacts(tree, url, found_contacts)
+    print(f"Найдено контактов после Playwright: {len(found_contacts)}")
+
+    # Если контакты все еще не найдены, ищем в навигационных ссылках
+    if not found_contacts and first_tree is not None:
+        print("Контакты не найдены, ищем в навигационных ссылках (Playwright)...")
+        
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                
-                print(f"--- Playwright парсинг: {url} ---")
-                page.goto(url, wait_until='networkidle', timeout=20000)
-                
-                page.wait_for_timeout(1500)
-
-                content = page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-
-                parse_page_for_contacts(soup, url, found_contacts)
-                
-                print(f"Найдено контактов после Playwright: {len(found_contacts)}")
-                
-                browser.close()
+            navigation_links = _extract_navigation_links_selectolax(first_tree, first_url)
+            promising_links = [link_url for link_url in _filter_contact_links(navigation_links)
+                               if link_url not in url_to_entity_id]  # Избегаем дубликатов
+            
+            # Ссылок не больше 10 - рендерим все сразу, разбираем до первых найденных контактов
+            for link_url, content in _run_async(_render_pages(promising_links, timeout=15000, settle_ms=1000)):
+                if content is None:
+                    continue
+                link_tree = HTMLParser(content)
+                parse_page_for_contacts(link_tree, link_url, found_contacts)
                 
+                # Выходим раньше, если нашли контакты
+                if found_contacts:
+                    break
         except Exception as e:
-            print(f"Error processing {url}: {e}")
-            continue
+            print(f"Ошибка при извлечении навигационных ссылок: {e}")
 
-            # Если контакты все еще не найдены, ищем в навигационных ссылках
-            if not found_contacts and urls_to_process:
-                print("Контакты не найдены, ищем в навигационных ссылках (Playwright)...")
-                
-                try:
-                    # Используем первую страницу для извлечения навигации
-                    first_url = urls_to_process[0]
-                    page.goto(first_url, wait_until='networkidle', timeout=20000)
-                    page.wait_for_timeout(1500)
-                    
-                    content = page.content()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    navigation_links = _extract_navigation_links(soup, first_url)
-                    promising_links = _filter_contact_links(navigation_links)
-                    
-                    for link_url in promising_links:
-                        if link_url not in urls_to_process:  # Избегаем дубликатов
-                            try:
-                                print(f"--- Playwright навигационная ссылка: {link_url} ---")
-                                page.goto(link_url, wait_until='networkidle', timeout=15000)
-                                page.wait_for_timeout(1000)
-                                
-                                content = page.content()
-                                link_soup = BeautifulSoup(content, 'html.parser')
-                                parse_page_for_contacts(link_soup, link_url, found_contacts)
-                                
-                                # Выходим раньше, если нашли контакты
-                                if found_contacts:
-                                    break
-                                    
-                            except Exception as e:
-                                print(f"Ошибка при обработке ссылки {link_url}: {e}")
-                                continue
-                except Exception as e:
-                    print(f"Ошибка при извлечении навигационных ссылок: {e}")
-
-            browser.close()
-
-    contacts_list = [{
-        'type': c[0],
-        'value': c[1],
-        'source': c[2],
-        'entity_id': url_to_entity_id.get(c[2])
-    } for c in found_contacts]
-    
-    # Дедупликация контактов с нормализацией
-    unique_contacts = {}
-    for contact in contacts_list:
-        # Нормализация значения для дедупликации
-        normalized_value = contact['value'].lower().strip()
-        
-        # Для телефонов: убираем все не-цифры кроме +
-        if contact['type'] == 'phone':
-            normalized_value = re.sub(r'[^0-9+]', '', normalized_value)
-        # Для email: приводим к нижнему регистру
-        elif contact['type'] == 'email':
-            normalized_value = normalized_value.lower()
-        # Для мессенджеров: убираем + в начале номеров
-        elif contact['type'] == 'messenger':
-            if normalized_value.startswith('whatsapp:') or normalized_value.startswith('viber:'):
-                number_part = normalized_value.split(':', 1)[1].strip()
-                number_part = re.sub(r'[^0-9+]', '', number_part)
-                normalized_value = f"{contact['type'].lower()}:{number_part}"
-            else:
-                normalized_value = f"{contact['type'].lower()}:{normalized_value}"
-        else:
-            normalized_value = f"{contact['type'].lower()}:{normalized_value}"
-        
-        # Используем только нормализованное значение как ключ (без источника)
-        key = f"{contact.get('entity_id')}|{normalized_value}"
-        if key not in unique_contacts:
-            # Очистка от URL encoding и лишних пробелов
-            clean_value = contact['value'].replace('%20', ' ').strip()
-            # Дополнительная очистка телефонов
-            if contact['type'] == 'phone':
-                # Убираем множественные пробелы и форматируем
-                phone = re.sub(r'\s+', ' ', clean_value)
-                phone = re.sub(r'^8\s*\(', '+7 (', phone)  # 8 (...) -> +7 (...)
-                clean_value = phone
-            
-            unique_contacts[key] = {
-                'type': contact['type'],
-                'value': clean_value,
-                'source': contact['source'],
-                'entity_id': contact.get('entity_id')
-            }
-    
-    final_contacts = list(unique_contacts.values())
+    # Контакты дедуплицированы и очищены еще при добавлении
+    final_contacts = found_contacts.contacts()
 
     return jsonify({
         'success': True,
@@ -1438,7 +1772,7 @@ def parse_contacts_endpoint():
 
 @app.route('/Agent')
 def agent_page():
-    return render_template('agent.html', engines=working_engines)
+    return _render_page('agent.html')
 
 
 @app.route('/api/agent-status', methods=['GET'])
@@ -1475,10 +1809,7 @@ def agent_create_plan():
         agent = TaskAgent(ollama_url=ollama_url, model=model)
         return await agent.create_plan(task_description)
     
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    result = loop.run_until_complete(create_plan_async())
-    loop.close()
+    result = _run_isolated(create_plan_async())
     
     return jsonify(result)
 
@@ -1504,10 +1835,7 @@ def agent_execute():
         else:
             return await agent.create_plan(task_description)
     
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    result = loop.run_until_complete(run_task_async())
-    loop.close()
+    result = _run_isolated(run_task_async())
     
     return jsonify(result)
 
@@ -1515,4 +1843,6 @@ def agent_execute():
 if __name__ == '__main__':
     if not os.path.exists('exports'):
         os.makedirs('exports')
-    app.run(debug=False, host='0.0.0.0', port=5003, threaded=False)
+    # Встроенный сервер только для разработки, в продакшене - gunicorn (см. WEBUI_README.md)
+    debug = os.environ.get('FLASK_ENV') == 'development'
+    app.run(debug=debug, host='0.0.0.0', port=5003, threaded=False)